@@ -4,14 +4,16 @@ ActivityPub Actor Module
 Handles actor creation and webfinger protocol
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+import hashlib
+
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
 from typing import Dict, Any
 
 class ActorManager:
     def __init__(self, local_domain: str, actor_name: str, display_name: str, public_key_pem: str):
         """Initialize the actor manager.
-        
+
         Args:
             local_domain: The server's domain
             actor_name: Username for the actor
@@ -23,23 +25,49 @@ class ActorManager:
         self.display_name = display_name
         self.actor_id = f"https://{local_domain}/users/{actor_name}"
         self.public_key_pem = public_key_pem
-    
+        # The profile and webfinger payloads are static for the lifetime
+        # of the manager, and federated discovery hammers both endpoints.
+        # Serialize them once here and replay the bytes with a fixed ETag
+        # instead of rebuilding and re-encoding the dicts per request.
+        self.webfinger_resource = f"acct:{actor_name}@{local_domain}"
+        self._actor_bytes = orjson.dumps(self.get_actor_data())
+        self._actor_etag = hashlib.blake2b(self._actor_bytes, digest_size=8).hexdigest()
+        self._webfinger_bytes = orjson.dumps(self.get_webfinger_data(self.webfinger_resource))
+        self._webfinger_etag = hashlib.blake2b(self._webfinger_bytes, digest_size=8).hexdigest()
+
+    @staticmethod
+    def _cached_response(request: Request, body: bytes, etag: str, media_type: str) -> Response:
+        """Serve precomputed bytes, answering 304 on a matching If-None-Match."""
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(
+            content=body,
+            media_type=media_type,
+            headers={"ETag": etag, "Cache-Control": "public, max-age=300"}
+        )
+
     def register_routes(self, app: FastAPI):
         """Register actor-related routes with the FastAPI app."""
-        
+
         @app.get(f"/users/{self.actor_name}")
-        async def actor():
+        async def actor(request: Request):
             """Returns the actor's profile"""
-            return JSONResponse(content=self.get_actor_data())
-        
+            return self._cached_response(
+                request, self._actor_bytes, self._actor_etag,
+                "application/activity+json"
+            )
+
         @app.get("/.well-known/webfinger")
-        async def webfinger(resource: str):
+        async def webfinger(request: Request, resource: str):
             """Webfinger protocol implementation for actor discovery"""
-            if resource and resource == f"acct:{self.actor_name}@{self.local_domain}":
-                return JSONResponse(content=self.get_webfinger_data(resource))
+            if resource and resource == self.webfinger_resource:
+                return self._cached_response(
+                    request, self._webfinger_bytes, self._webfinger_etag,
+                    "application/jrd+json"
+                )
             else:
                 raise HTTPException(status_code=404, detail='Resource not found')
-    
+
     def get_actor_data(self) -> Dict[str, Any]:
         """Generate the actor profile data."""
         return {
@@ -63,7 +91,7 @@ class ActorManager:
                 "uploadMedia": f"{self.actor_id}/endpoints/uploadMedia"
             }
         }
-    
+
     def get_webfinger_data(self, resource: str) -> Dict[str, Any]:
         """Generate webfinger response data."""
         return {
@@ -75,4 +103,4 @@ class ActorManager:
                     'href': self.actor_id
                 }
             ],
-        }
\ No newline at end of file
+        }
@@ -4,6 +4,11 @@ ActivityPub Inbox/Outbox Module
 Handles inbox and outbox functionality for ActivityPub
 """
 
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import count
+
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -12,8 +17,17 @@ from datetime import datetime
 
 from signature import generate_http_signature
 
+# Compiled once at import; hashtags are extracted a single time when an
+# activity is stored rather than re-scanned on every query
+_HASHTAG_RE = re.compile(r"#(\w+)", re.UNICODE)
+
+# Cap on per-actor fanout lists, Twitter-style: old entries fall off so
+# the write-time indexes stay bounded however long the server runs
+MAX_TIMELINE = 800
+
 class Activity(BaseModel):
     type: str
+    actor: Optional[str] = None
     object: Optional[Dict[str, Any]] = None
 
 class InboxOutboxManager:
@@ -31,6 +45,44 @@ class InboxOutboxManager:
         self.local_domain = local_domain
         self.private_key = private_key
         self.activities: List[Dict[str, Any]] = []
+        # Activities arrive in order, so the list is already sorted by
+        # this monotonically increasing sequence number; pagination can
+        # bisect into it instead of scanning and re-sorting
+        self._ids: List[int] = []
+        self._next_id = count(1)
+        # Inverted hashtag index maintained at write time, so hashtag
+        # queries are a dict lookup instead of a substring scan over
+        # every stored activity
+        self.by_hashtag: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Incoming activities get their own store and id index so the
+        # inbox can be read and paged independently of what we publish
+        self.inbox_activities: List[Dict[str, Any]] = []
+        self._inbox_ids: List[int] = []
+        # Fan-out-on-write: received activities are also pushed into a
+        # per-actor list at store time, so reading one actor's items is
+        # an index lookup instead of a filter over the whole inbox
+        self.by_actor: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+    def _store(self, activity: Dict[str, Any]) -> None:
+        """Append an activity, keeping the parallel indexes in step."""
+        self._ids.append(next(self._next_id))
+        self.activities.append(activity)
+        content = (activity.get("object") or {}).get("content") or ""
+        for tag in {m.group(1).lower() for m in _HASHTAG_RE.finditer(content)}:
+            self.by_hashtag[tag].append(activity)
+
+    @staticmethod
+    def _page(ids: List[int], items: List[Dict[str, Any]],
+              since_id: Optional[int], max_id: Optional[int], limit: int) -> List[Dict[str, Any]]:
+        """Slice the newest `limit` items of an id window, newest first.
+
+        The id index is sorted, so the window resolves with two
+        bisections and a slice — O(log N + limit) rather than a filter
+        pass over the whole collection.
+        """
+        lo = bisect_right(ids, since_id) if since_id is not None else 0
+        hi = bisect_left(ids, max_id, lo) if max_id is not None else len(ids)
+        return items[max(lo, hi - limit):hi][::-1]
     
     def register_routes(self, app: FastAPI):
         """Register inbox/outbox routes with the FastAPI app."""
@@ -39,6 +91,14 @@ class InboxOutboxManager:
         async def inbox(activity: Activity):
             """Handle incoming activities."""
             return await self.handle_inbox(activity)
+
+        @app.get(f"/users/{self.actor_name}/inbox")
+        async def inbox_get(since_id: Optional[int] = None,
+                            max_id: Optional[int] = None,
+                            limit: int = 20,
+                            actor: Optional[str] = None):
+            """Get the contents of the inbox, optionally for one actor."""
+            return await self.handle_inbox_get(since_id, max_id, limit, actor)
         
         @app.post(f"/users/{self.actor_name}/outbox")
         async def outbox(request: Request):
@@ -46,16 +106,31 @@ class InboxOutboxManager:
             return await self.handle_outbox(request)
         
         @app.get(f"/users/{self.actor_name}/outbox")
-        async def outbox_get():
+        async def outbox_get(since_id: Optional[int] = None,
+                             max_id: Optional[int] = None,
+                             limit: int = 20):
             """Get the contents of the outbox."""
-            return await self.handle_outbox_get()
+            return await self.handle_outbox_get(since_id, max_id, limit)
+
+        @app.get(f"/users/{self.actor_name}/outbox/tags/{{hashtag}}")
+        async def outbox_by_hashtag(hashtag: str, limit: int = 20):
+            """Get outbox activities mentioning a hashtag."""
+            return await self.handle_outbox_by_hashtag(hashtag, limit)
     
     async def handle_inbox(self, activity: Activity):
         """Process incoming activities from other actors."""
         if activity.type == 'Create':
             print(f"Received note: {activity.object['content']}")
-            # Store incoming activities in the collection
-            self.activities.append(activity.dict())
+            # Store incoming activities in the inbox collection
+            data = activity.dict()
+            self._inbox_ids.append(next(self._next_id))
+            self.inbox_activities.append(data)
+            actor = data.get("actor")
+            if actor:
+                fanout = self.by_actor[actor]
+                fanout.append(data)
+                # Keep the per-actor list bounded
+                del fanout[:-MAX_TIMELINE]
             return JSONResponse(content={'message': 'Activity Received'}, status_code=202)
         else:
             raise HTTPException(status_code=400, detail='Activity type not supported')
@@ -77,7 +152,7 @@ class InboxOutboxManager:
             request = None
         
         # Store the activity in our collection
-        self.activities.append(activity)
+        self._store(activity)
         
         # If we have a request, sign the response
         if request:
@@ -98,15 +173,54 @@ class InboxOutboxManager:
             # No request, just return the activity
             return JSONResponse(content=activity, status_code=202)
     
-    async def handle_outbox_get(self):
-        """Retrieve the collection of activities from the outbox."""
-        # Create an ordered collection of activities
+    async def handle_outbox_get(self, since_id: Optional[int] = None,
+                                max_id: Optional[int] = None, limit: int = 20):
+        """Retrieve a page of activities from the outbox."""
         collection = {
             "@context": "https://www.w3.org/ns/activitystreams",
             "type": "OrderedCollection",
             "id": f"{self.actor_id}/outbox",
             "totalItems": len(self.activities),
-            "orderedItems": self.activities
+            "orderedItems": self._page(self._ids, self.activities, since_id, max_id, limit)
         }
-        
+
+        return JSONResponse(content=collection)
+
+    async def handle_inbox_get(self, since_id: Optional[int] = None,
+                               max_id: Optional[int] = None, limit: int = 20,
+                               actor: Optional[str] = None):
+        """Retrieve a page of activities from the inbox.
+
+        With `actor` set, the page comes straight off the per-actor
+        fanout list written at store time — O(limit) with no filtering.
+        """
+        if actor is not None:
+            items = self.by_actor.get(actor, [])
+            page = items[-limit:][::-1]
+            total = len(items)
+        else:
+            page = self._page(self._inbox_ids, self.inbox_activities, since_id, max_id, limit)
+            total = len(self.inbox_activities)
+
+        collection = {
+            "@context": "https://www.w3.org/ns/activitystreams",
+            "type": "OrderedCollection",
+            "id": f"{self.actor_id}/inbox",
+            "totalItems": total,
+            "orderedItems": page
+        }
+
+        return JSONResponse(content=collection)
+
+    async def handle_outbox_by_hashtag(self, hashtag: str, limit: int = 20):
+        """Retrieve activities for a hashtag from the write-time index."""
+        matches = self.by_hashtag.get(hashtag.lower(), [])
+        collection = {
+            "@context": "https://www.w3.org/ns/activitystreams",
+            "type": "OrderedCollection",
+            "id": f"{self.actor_id}/outbox/tags/{hashtag}",
+            "totalItems": len(matches),
+            "orderedItems": matches[-limit:][::-1]
+        }
+
         return JSONResponse(content=collection)
\ No newline at end of file
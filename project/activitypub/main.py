@@ -8,6 +8,8 @@ Adapted from: https://blog.joinmastodon.org/2018/06/how-to-implement-a-basic-act
 """
 
 import datetime
+import hashlib
+import time
 import uuid
 import os
 from contextlib import asynccontextmanager
@@ -32,6 +34,9 @@ LOCAL_DOMAIN = "127.0.0.1:8080"
 ACTOR_NAME = "beebo"
 DISPLAY_NAME = "Beebo Baggins"
 
+# Public addressing for ActivityPub activities, shared across all posts
+AS_PUBLIC = ["https://www.w3.org/ns/activitystreams#Public"]
+
 # Media storage configuration
 MEDIA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "media")
 os.makedirs(MEDIA_DIR, exist_ok=True)
@@ -49,6 +54,16 @@ public_key_pem = public_key.public_bytes(
     format=serialization.PublicFormat.SubjectPublicKeyInfo
 ).decode('utf-8')
 
+def _new_post_id() -> str:
+    """Generate a time-ordered post id, ULID-style.
+
+    A fixed-width nanosecond timestamp prefix makes ids sort
+    lexicographically by creation time, so since_id/max_id comparisons
+    hold without a separate sort key; the random tail keeps two posts
+    in the same nanosecond from colliding.
+    """
+    return f"{time.time_ns():016x}{uuid.uuid4().hex[:8]}"
+
 # Create actor and inbox/outbox managers
 actor_id = f"https://{LOCAL_DOMAIN}/users/{ACTOR_NAME}"
 actor_manager = ActorManager(LOCAL_DOMAIN, ACTOR_NAME, DISPLAY_NAME, public_key_pem)
@@ -72,7 +87,7 @@ async def send_text_post(content: str):
             "content": content,
             "published": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             "attributedTo": actor_id,
-            "to": ["https://www.w3.org/ns/activitystreams#Public"]  # everyone can see
+            "to": AS_PUBLIC  # everyone can see
         }
     }
 
@@ -93,18 +108,21 @@ async def upload_media(file_data: bytes, filename: str, content_type: str):
     Returns:
         URL to the uploaded media
     """
-    # Generate a unique ID for the media
-    media_id = str(uuid.uuid4())
-    
+    # Content-addressed ID: the blake2b digest of the bytes, so the same
+    # upload always maps to the same path and re-uploads dedupe for free
+    media_id = hashlib.blake2b(file_data, digest_size=16).hexdigest()
+
     # Create directory for this media item
     media_path = os.path.join(MEDIA_DIR, media_id)
     os.makedirs(media_path, exist_ok=True)
-    
-    # Save the file
+
+    # Save the file, skipping the write if these bytes are already here
     file_path = os.path.join(media_path, filename)
-    with open(file_path, "wb") as f:
-        f.write(file_data)
-    
+    if not os.path.exists(file_path):
+        with open(file_path, "wb") as f:
+            f.write(file_data)
+
+
     # Return a URL that would serve this file
     media_url = f"https://{LOCAL_DOMAIN}/media/{media_id}/{filename}"
     
@@ -125,9 +143,8 @@ async def send_check_in(content: str, latitude: float, longitude: float, image_d
         image_data: Dictionary with image information (from upload_media)
         location_name: Optional name of the location
     """
-    # Generate a unique ID for this post
-    post_uuid = str(uuid.uuid4())
-    post_id = f"{actor_id}/post/{post_uuid}"
+    # Generate a unique, time-ordered ID for this post
+    post_id = f"{actor_id}/post/{_new_post_id()}"
     
     # Create the location object
     location = {
@@ -146,7 +163,7 @@ async def send_check_in(content: str, latitude: float, longitude: float, image_d
         "id": post_id,
         "type": "Create",
         "actor": actor_id,
-        "to": ["https://www.w3.org/ns/activitystreams#Public"],
+        "to": AS_PUBLIC,
         "object": {
             "type": "Note",
             "id": f"{post_id}/object",
@@ -162,13 +179,13 @@ async def send_check_in(content: str, latitude: float, longitude: float, image_d
                     "mediaType": image_data["mediaType"]
                 }
             ],
-            "to": ["https://www.w3.org/ns/activitystreams#Public"]
+            "to": AS_PUBLIC
         }
     }
 
     # Send the activity to the outbox
     response = await inbox_outbox_manager.handle_outbox(activity)
-    
+
     return activity
 
 async def test_activitypub():
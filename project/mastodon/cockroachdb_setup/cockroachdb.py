@@ -65,6 +65,12 @@ def create_tables():
                         bio TEXT,
                         avatar_url TEXT,
                         header_url TEXT,
+                        -- Denormalized counts maintained by triggers so
+                        -- profile loads stay single-row regardless of
+                        -- how large the follower graph grows
+                        followers_count INT NOT NULL DEFAULT 0,
+                        following_count INT NOT NULL DEFAULT 0,
+                        statuses_count INT NOT NULL DEFAULT 0,
                         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
                     );
@@ -85,8 +91,13 @@ def create_tables():
                         place_name TEXT,
                         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                        INDEX (user_id),
-                        INDEX (created_at)
+                        -- Composite indexes matching the keyset pagination
+                        -- order used by the timeline queries; the public
+                        -- timeline gets a partial index so it only ever
+                        -- scans rows it can return
+                        INDEX statuses_public_created_idx (created_at DESC, id DESC) WHERE visibility = 'public',
+                        INDEX (created_at DESC, id DESC),
+                        INDEX (user_id, created_at DESC, id DESC)
                     );
                 """)
                 print("✅ Created statuses table")
@@ -140,7 +151,9 @@ def create_tables():
                         hashtag_id UUID NOT NULL REFERENCES hashtags(id),
                         created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
                         PRIMARY KEY (status_id, hashtag_id),
-                        INDEX (hashtag_id)
+                        -- Newest-first within a hashtag, so the hashtag
+                        -- timeline walks the link table in return order
+                        INDEX (hashtag_id, created_at DESC, status_id DESC)
                     );
                 """)
                 print("✅ Created status_hashtags table")
@@ -159,6 +172,53 @@ def create_tables():
                 """)
                 print("✅ Created mentions table")
 
+                # Maintain the denormalized user counts on write
+                cur.execute("""
+                    CREATE OR REPLACE FUNCTION update_rel_counts() RETURNS TRIGGER AS $$
+                    BEGIN
+                        IF (TG_OP = 'INSERT') THEN
+                            IF NEW.relationship_type = 'follow' THEN
+                                UPDATE users SET followers_count = followers_count + 1 WHERE id = NEW.following_id;
+                                UPDATE users SET following_count = following_count + 1 WHERE id = NEW.follower_id;
+                            END IF;
+                            RETURN NEW;
+                        ELSIF (TG_OP = 'DELETE') THEN
+                            IF OLD.relationship_type = 'follow' THEN
+                                UPDATE users SET followers_count = followers_count - 1 WHERE id = OLD.following_id;
+                                UPDATE users SET following_count = following_count - 1 WHERE id = OLD.follower_id;
+                            END IF;
+                            RETURN OLD;
+                        END IF;
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                """)
+                cur.execute("""
+                    CREATE TRIGGER rel_count_trg
+                    AFTER INSERT OR DELETE ON relationships
+                    FOR EACH ROW EXECUTE FUNCTION update_rel_counts();
+                """)
+                cur.execute("""
+                    CREATE OR REPLACE FUNCTION update_status_counts() RETURNS TRIGGER AS $$
+                    BEGIN
+                        IF (TG_OP = 'INSERT') THEN
+                            UPDATE users SET statuses_count = statuses_count + 1 WHERE id = NEW.user_id;
+                            RETURN NEW;
+                        ELSIF (TG_OP = 'DELETE') THEN
+                            UPDATE users SET statuses_count = statuses_count - 1 WHERE id = OLD.user_id;
+                            RETURN OLD;
+                        END IF;
+                        RETURN NULL;
+                    END;
+                    $$ LANGUAGE plpgsql;
+                """)
+                cur.execute("""
+                    CREATE TRIGGER status_count_trg
+                    AFTER INSERT OR DELETE ON statuses
+                    FOR EACH ROW EXECUTE FUNCTION update_status_counts();
+                """)
+                print("✅ Created count-maintenance triggers")
+
                 # Commit all changes
                 conn.commit()
                 print("\n✨ All tables created successfully!")
@@ -4,8 +4,8 @@ ActivityPub Module
 This module implements the core ActivityPub functionality.
 """
 
-from .actor import Actor
+from .actor import Actor, begin_actor_cache, end_actor_cache
 from .inbox_outbox import Inbox, Outbox
 from .signature import verify_server_signature
 
-__all__ = ['Actor', 'Inbox', 'Outbox', 'verify_server_signature'] 
\ No newline at end of file
+__all__ = ['Actor', 'begin_actor_cache', 'end_actor_cache', 'Inbox', 'Outbox', 'verify_server_signature']
\ No newline at end of file
@@ -4,9 +4,8 @@ Actor Module
 This module implements the Actor class for ActivityPub.
 """
 
-import json
 import logging
-from datetime import datetime
+from contextvars import ContextVar
 
 from server.database import db
 
@@ -14,6 +13,22 @@ from server.database import db
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Request-scoped actor cache. Handlers may construct Actor("alice")
+# several times while serving one request (e.g. once per status in a
+# timeline); within a request the hydrated state is reused instead of
+# reloading from the database. The middleware in server.main installs a
+# fresh dict per request and resets it afterwards, so nothing leaks
+# across requests.
+_actor_cache: ContextVar = ContextVar("actor_cache", default=None)
+
+def begin_actor_cache():
+    """Install a fresh per-request actor cache; returns the reset token."""
+    return _actor_cache.set({})
+
+def end_actor_cache(token):
+    """Tear down the per-request actor cache."""
+    _actor_cache.reset(token)
+
 class Actor:
     """Represents a Mastodon user actor."""
     
@@ -29,38 +44,73 @@ class Actor:
         self.bio = None
         self.avatar = None
         self.header = None
-        self.followers_count = 0
-        self.following_count = 0
-        self.statuses_count = 0
-        
+        self._user_id = None
+        self._followers_count = None
+        self._following_count = None
+        self._statuses_count = None
+        self._cached_dict = None
+        # URL prefix shared by every endpoint this actor exposes
+        self._base = f"https://example.com/users/{username}"
+
         if username:
+            cache = _actor_cache.get()
+            cached = cache.get(username) if cache is not None else None
+            if cached is not None:
+                # Same request already hydrated this actor; reuse its state
+                self.__dict__.update(cached.__dict__)
+                return
             self.load_from_db()
+            if cache is not None and self._user_id is not None:
+                cache[username] = self
             
     def load_from_db(self):
-        """Load actor data from database."""
+        """Load actor data from database, creating the user if missing."""
         try:
-            user = db.get_user(self.username)
+            # One round trip whether the user exists or not, and no
+            # lost race between two handlers both seeing "not found"
+            user = db.upsert_user(username=self.username)
             if user:
                 self.display_name = user.get('display_name')
                 self.bio = user.get('bio')
                 self.avatar = user.get('avatar_url')
                 self.header = user.get('header_url')
-                self.followers_count = len(db.get_followers(user['id']))
-                self.following_count = len(db.get_following(user['id']))
-                self.statuses_count = len(db.get_user_statuses(user['id']))
-            else:
-                # Create new user if not found
-                user = db.create_user(
-                    username=self.username,
-                    display_name=self.username,
-                    bio="",
-                    avatar_url=None,
-                    header_url=None
-                )
-                if user:
-                    self.display_name = user['display_name']
+                self._user_id = user['id']
+                # The trigger-maintained count columns ride along on the
+                # row we already fetched
+                self._followers_count = user.get('followers_count')
+                self._following_count = user.get('following_count')
+                self._statuses_count = user.get('statuses_count')
+                self._cached_dict = None
         except Exception as e:
             logger.error(f"Error loading actor from database: {e}")
+
+    def _load_counts(self):
+        """Fetch all three profile counts in a single round trip."""
+        row = db.get_user_with_counts(self.username) if self._user_id else None
+        self._followers_count = row['followers_count'] if row else 0
+        self._following_count = row['following_count'] if row else 0
+        self._statuses_count = row['statuses_count'] if row else 0
+
+    @property
+    def followers_count(self):
+        """Follower count, queried on first access and then cached."""
+        if self._followers_count is None:
+            self._load_counts()
+        return self._followers_count
+
+    @property
+    def following_count(self):
+        """Following count, queried on first access and then cached."""
+        if self._following_count is None:
+            self._load_counts()
+        return self._following_count
+
+    @property
+    def statuses_count(self):
+        """Status count, queried on first access and then cached."""
+        if self._statuses_count is None:
+            self._load_counts()
+        return self._statuses_count
             
     def save_to_db(self):
         """Save actor data to database."""
@@ -73,33 +123,40 @@ class Actor:
                     avatar_url=self.avatar,
                     header_url=self.header
                 )
+                # Invalidate the serialized form so the next to_dict rebuilds it
+                self._cached_dict = None
         except Exception as e:
             logger.error(f"Error saving actor to database: {e}")
             
     def to_dict(self):
         """
         Convert actor to dictionary.
-        
+
+        Actor data changes rarely, so the dict is built once and reused
+        until save_to_db or load_from_db invalidates it.
+
         Returns:
             Dict containing actor data
         """
-        return {
+        if self._cached_dict is not None:
+            return self._cached_dict
+        self._cached_dict = {
             "@context": [
                 "https://www.w3.org/ns/activitystreams",
                 "https://w3id.org/security/v1"
             ],
-            "id": f"https://example.com/users/{self.username}",
+            "id": self._base,
             "type": "Person",
             "name": self.display_name or self.username,
             "preferredUsername": self.username,
             "summary": self.bio or "",
-            "inbox": f"https://example.com/users/{self.username}/inbox",
-            "outbox": f"https://example.com/users/{self.username}/outbox",
-            "followers": f"https://example.com/users/{self.username}/followers",
-            "following": f"https://example.com/users/{self.username}/following",
+            "inbox": self._base + "/inbox",
+            "outbox": self._base + "/outbox",
+            "followers": self._base + "/followers",
+            "following": self._base + "/following",
             "publicKey": {
-                "id": f"https://example.com/users/{self.username}#main-key",
-                "owner": f"https://example.com/users/{self.username}",
+                "id": self._base + "#main-key",
+                "owner": self._base,
                 "publicKeyPem": "-----BEGIN PUBLIC KEY-----\nMIIBIjANBgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEA...\n-----END PUBLIC KEY-----"
             },
             "icon": {
@@ -112,4 +169,5 @@ class Actor:
                 "mediaType": "image/jpeg",
                 "url": self.header or "https://example.com/header.jpg"
             }
-        } 
\ No newline at end of file
+        }
+        return self._cached_dict
@@ -4,12 +4,109 @@ ActivityPub Inbox/Outbox
 This module implements the ActivityPub inbox and outbox models.
 """
 
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
-import re
+
+try:
+    # google-re2 scans in linear time via a DFA; federated content can be
+    # arbitrarily long, so prefer it when the binding is installed
+    import re2 as re
+except ImportError:
+    import re
+
 from ..database import db
 from ..queue import ActivityQueue
 
+# Public addressing for ActivityPub activities, shared across all statuses
+AS_PUBLIC = ["https://www.w3.org/ns/activitystreams#Public"]
+
+# Compiled once at import so the publish path skips the re-cache lookup
+_HASHTAG_RE = re.compile(r'#(\w+)')
+
+# Fields identical for every account; built once and merged into each
+# serialized dict instead of reallocated per user. The empty lists are
+# tuples so the shared objects can never be mutated through a response.
+_ACCOUNT_STATIC = {
+    "locked": False,
+    "bot": False,
+    "discoverable": True,
+    "group": False,
+    "last_status_at": None,
+    "emojis": (),
+    "fields": (),
+}
+
+def _serialize_account(user: Dict, follower_counts: Dict,
+                       following_counts: Dict, status_counts: Dict) -> Dict:
+    """
+    Build the Mastodon account dict for a user row.
+
+    Args:
+        user: User row from the database
+        follower_counts: Follower counts keyed by user ID
+        following_counts: Following counts keyed by user ID
+        status_counts: Status counts keyed by user ID
+
+    Returns:
+        Formatted account dict
+    """
+    avatar = user['avatar_url'] or "https://example.com/avatar.jpg"
+    header = user['header_url'] or "https://example.com/header.jpg"
+    return {
+        **_ACCOUNT_STATIC,
+        "id": f"/users/{user['username']}",
+        "username": user['username'],
+        "acct": user['username'],
+        "display_name": user['display_name'] or user['username'],
+        "created_at": user['created_at'],
+        "note": user['bio'] or "",
+        "url": f"https://example.com/users/{user['username']}",
+        "avatar": avatar,
+        "avatar_static": avatar,
+        "header": header,
+        "header_static": header,
+        "followers_count": follower_counts.get(user['id'], 0),
+        "following_count": following_counts.get(user['id'], 0),
+        "statuses_count": status_counts.get(user['id'], 0),
+    }
+
+@dataclass(slots=True)
+class IncomingStatus:
+    """
+    Flattened view of an incoming status payload.
+
+    The nested payload dict is unpacked once here so the publish path
+    uses plain attribute access instead of chained dict.get calls.
+    """
+    username: Optional[str]
+    content: str = ''
+    visibility: str = 'public'
+    sensitive: bool = False
+    spoiler_text: str = ''
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_name: Optional[str] = None
+    media_attachments: List[Dict] = field(default_factory=list)
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "IncomingStatus":
+        """Parse a raw status dict into an IncomingStatus."""
+        account = payload.get('account') or {}
+        location = payload.get('location') or {}
+        coordinates = location.get('coordinates') or [None, None]
+        return cls(
+            username=account.get('username'),
+            content=payload.get('content') or '',
+            visibility=payload.get('visibility', 'public'),
+            sensitive=payload.get('sensitive', False),
+            spoiler_text=payload.get('spoiler_text', ''),
+            longitude=coordinates[0],
+            latitude=coordinates[1],
+            location_name=location.get('name'),
+            media_attachments=payload.get('media_attachments') or []
+        )
+
 class Inbox:
     """Handles incoming activities."""
     
@@ -66,49 +163,55 @@ class Outbox:
         Args:
             status: Status to add
         """
-        # Extract user ID from account
-        username = status.get('account', {}).get('username')
-        if not username:
+        # Unpack the payload once
+        incoming = IncomingStatus.from_payload(status)
+        if not incoming.username:
             raise ValueError("Status must include account information")
-            
+
         # Get user from database
-        user = db.get_user(username)
+        user = db.get_user(incoming.username)
         if not user:
-            raise ValueError(f"User {username} not found")
-            
+            raise ValueError(f"User {incoming.username} not found")
+
         # Create status in database
         db_status = db.create_status(
             user_id=user['id'],
-            content=status.get('content', ''),
-            visibility=status.get('visibility', 'public'),
-            sensitive=status.get('sensitive', False),
-            spoiler_text=status.get('spoiler_text', ''),
-            latitude=status.get('location', {}).get('coordinates', [None, None])[1],
-            longitude=status.get('location', {}).get('coordinates', [None, None])[0]
+            content=incoming.content,
+            visibility=incoming.visibility,
+            sensitive=incoming.sensitive,
+            spoiler_text=incoming.spoiler_text,
+            latitude=incoming.latitude,
+            longitude=incoming.longitude
         )
-        
-        # Create activity
+
+        # Extract and link hashtags in one batched pair of statements
+        db.attach_hashtags(db_status['id'], _HASHTAG_RE.findall(incoming.content))
+
+        # Create activity (one timestamp per invocation)
+        # Timezone-aware avoids the implicit local-time conversion and
+        # gives federation peers an unambiguous timestamp
+        now_iso = datetime.now(timezone.utc).isoformat()
         activity = {
             "@context": "https://www.w3.org/ns/activitystreams",
             "id": f"{actor_id}/status/{db_status['id']}",
             "type": "Create",
             "actor": actor_id,
-            "published": datetime.now().isoformat(),
-            "to": ["https://www.w3.org/ns/activitystreams#Public"],
+            "published": now_iso,
+            "to": AS_PUBLIC,
             "object": {
                 "@context": "https://www.w3.org/ns/activitystreams",
                 "id": f"{actor_id}/status/{db_status['id']}/object",
                 "type": "Note",
-                "content": status.get('content', ''),
+                "content": incoming.content,
                 "published": db_status['created_at'].isoformat(),
                 "attributedTo": actor_id,
-                "to": ["https://www.w3.org/ns/activitystreams#Public"]
+                "to": AS_PUBLIC
             }
         }
         
         # Add location if present
         if db_status['latitude'] is not None and db_status['longitude'] is not None:
-            location_name = status.get('location', {}).get('name', f"{db_status['latitude']}, {db_status['longitude']}")
+            location_name = incoming.location_name or f"{db_status['latitude']}, {db_status['longitude']}"
             activity['object']['location'] = {
                 "type": "Place",
                 "name": location_name,
@@ -116,73 +219,63 @@ class Outbox:
                 "longitude": db_status['longitude']
             }
         
-        # Add to queue
-        self.queue.add_activity(activity)
+        # Add to queue (batched with other recent activities)
+        self.queue.enqueue_activity_buffered(activity)
         
         return db_status
         
-    def get_statuses(
-        self,
-        limit: int = 20,
-        since_id: Optional[str] = None,
-        max_id: Optional[str] = None
-    ) -> List[Dict]:
+    def _serialize_statuses(self, db_statuses: List[Dict]) -> List[Dict]:
         """
-        Get statuses from outbox.
-        
+        Convert a page of status rows to Mastodon format.
+
+        All three outbox getters funnel through this one hot path:
+        users, media and counts are bulk-fetched once per page, and each
+        account dict is built once per distinct user.
+
         Args:
-            limit: Number of statuses to fetch
-            since_id: Return only statuses newer than this ID
-            max_id: Return only statuses older than this ID
-            
+            db_statuses: Status rows from the database
+
         Returns:
             List of statuses
         """
-        # Get statuses from database
-        db_statuses = db.get_public_timeline(limit, since_id, max_id)
-        
+        # Bulk-fetch users, media and counts once for the whole page
+        user_ids = {s['user_id'] for s in db_statuses}
+        status_ids = [s['id'] for s in db_statuses]
+        users_by_id = db.get_users_by_ids(user_ids)
+        media_by_status = db.get_status_media_bulk(status_ids)
+        follower_counts = db.get_follower_counts(user_ids)
+        following_counts = db.get_following_counts(user_ids)
+        status_counts = db.get_status_counts(user_ids)
+
         # Convert to Mastodon format
         statuses = []
+        accounts_cache = {}
         for db_status in db_statuses:
             # Get user
-            user = db.get_user_by_id(db_status['user_id'])
+            user = users_by_id.get(db_status['user_id'])
             if not user:
                 continue
-                
+
+            # Build the account dict once per user on this page
+            account = accounts_cache.get(user['id'])
+            if account is None:
+                account = accounts_cache.setdefault(
+                    user['id'],
+                    _serialize_account(user, follower_counts, following_counts, status_counts)
+                )
+
             # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
+            media_attachments = media_by_status.get(db_status['id'], [])
+
             # Create status dict
             status = {
                 "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
+                "created_at": db_status['created_at'],
                 "content": db_status['content'],
                 "visibility": db_status['visibility'],
                 "sensitive": db_status['sensitive'],
                 "spoiler_text": db_status['spoiler_text'] or "",
-                "account": {
-                    "id": f"/users/{user['username']}",
-                    "username": user['username'],
-                    "acct": user['username'],
-                    "display_name": user['display_name'] or user['username'],
-                    "locked": False,
-                    "bot": False,
-                    "discoverable": True,
-                    "group": False,
-                    "created_at": user['created_at'].isoformat(),
-                    "note": user['bio'] or "",
-                    "url": f"https://example.com/users/{user['username']}",
-                    "avatar": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "avatar_static": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "header": user['header_url'] or "https://example.com/header.jpg",
-                    "header_static": user['header_url'] or "https://example.com/header.jpg",
-                    "followers_count": len(db.get_followers(user['id'])),
-                    "following_count": len(db.get_following(user['id'])),
-                    "statuses_count": len(db.get_user_statuses(user['id'])),
-                    "last_status_at": None,
-                    "emojis": [],
-                    "fields": []
-                },
+                "account": account,
                 "media_attachments": [
                     {
                         "id": media['id'],
@@ -198,7 +291,7 @@ class Outbox:
                 ],
                 "location": None
             }
-            
+
             # Add location if present
             if db_status['latitude'] is not None and db_status['longitude'] is not None:
                 status["location"] = {
@@ -206,11 +299,30 @@ class Outbox:
                     "type": "Point",
                     "coordinates": [db_status['longitude'], db_status['latitude']]
                 }
-            
+
             statuses.append(status)
-            
+
         return statuses
-        
+
+    def get_statuses(
+        self,
+        limit: int = 20,
+        since_id: Optional[str] = None,
+        max_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Get statuses from outbox.
+
+        Args:
+            limit: Number of statuses to fetch
+            since_id: Return only statuses newer than this ID
+            max_id: Return only statuses older than this ID
+
+        Returns:
+            List of statuses
+        """
+        return self._serialize_statuses(db.get_public_timeline(limit, since_id, max_id))
+
     def get_statuses_by_hashtag(
         self,
         hashtag: str,
@@ -220,89 +332,18 @@ class Outbox:
     ) -> List[Dict]:
         """
         Get statuses containing hashtag.
-        
+
         Args:
             hashtag: Hashtag to search for
             limit: Number of statuses to fetch
             since_id: Return only statuses newer than this ID
             max_id: Return only statuses older than this ID
-            
+
         Returns:
             List of statuses
         """
-        # Get statuses from database
-        db_statuses = db.get_hashtag_timeline(hashtag, limit, since_id, max_id)
-        
-        # Convert to Mastodon format (similar to get_statuses)
-        statuses = []
-        for db_status in db_statuses:
-            # Get user
-            user = db.get_user_by_id(db_status['user_id'])
-            if not user:
-                continue
-                
-            # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
-            # Create status dict
-            status = {
-                "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
-                "content": db_status['content'],
-                "visibility": db_status['visibility'],
-                "sensitive": db_status['sensitive'],
-                "spoiler_text": db_status['spoiler_text'] or "",
-                "account": {
-                    "id": f"/users/{user['username']}",
-                    "username": user['username'],
-                    "acct": user['username'],
-                    "display_name": user['display_name'] or user['username'],
-                    "locked": False,
-                    "bot": False,
-                    "discoverable": True,
-                    "group": False,
-                    "created_at": user['created_at'].isoformat(),
-                    "note": user['bio'] or "",
-                    "url": f"https://example.com/users/{user['username']}",
-                    "avatar": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "avatar_static": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "header": user['header_url'] or "https://example.com/header.jpg",
-                    "header_static": user['header_url'] or "https://example.com/header.jpg",
-                    "followers_count": len(db.get_followers(user['id'])),
-                    "following_count": len(db.get_following(user['id'])),
-                    "statuses_count": len(db.get_user_statuses(user['id'])),
-                    "last_status_at": None,
-                    "emojis": [],
-                    "fields": []
-                },
-                "media_attachments": [
-                    {
-                        "id": media['id'],
-                        "type": media['file_type'],
-                        "url": media['url'],
-                        "preview_url": media['url'],
-                        "remote_url": None,
-                        "text_url": None,
-                        "description": media['description'] or None,
-                        "blurhash": None
-                    }
-                    for media in media_attachments
-                ],
-                "location": None
-            }
-            
-            # Add location if present
-            if db_status['latitude'] is not None and db_status['longitude'] is not None:
-                status["location"] = {
-                    "name": f"{db_status['latitude']}, {db_status['longitude']}",
-                    "type": "Point",
-                    "coordinates": [db_status['longitude'], db_status['latitude']]
-                }
-            
-            statuses.append(status)
-            
-        return statuses
-        
+        return self._serialize_statuses(db.get_hashtag_timeline(hashtag, limit, since_id, max_id))
+
     def get_statuses_by_user(
         self,
         username: str,
@@ -312,13 +353,13 @@ class Outbox:
     ) -> List[Dict]:
         """
         Get statuses by user.
-        
+
         Args:
             username: Username to fetch statuses for
             limit: Number of statuses to fetch
             since_id: Return only statuses newer than this ID
             max_id: Return only statuses older than this ID
-            
+
         Returns:
             List of statuses
         """
@@ -326,71 +367,5 @@ class Outbox:
         user = db.get_user(username)
         if not user:
             return []
-            
-        # Get statuses from database
-        db_statuses = db.get_user_statuses(user['id'], limit, since_id, max_id)
-        
-        # Convert to Mastodon format (similar to get_statuses)
-        statuses = []
-        for db_status in db_statuses:
-            # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
-            # Create status dict
-            status = {
-                "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
-                "content": db_status['content'],
-                "visibility": db_status['visibility'],
-                "sensitive": db_status['sensitive'],
-                "spoiler_text": db_status['spoiler_text'] or "",
-                "account": {
-                    "id": f"/users/{user['username']}",
-                    "username": user['username'],
-                    "acct": user['username'],
-                    "display_name": user['display_name'] or user['username'],
-                    "locked": False,
-                    "bot": False,
-                    "discoverable": True,
-                    "group": False,
-                    "created_at": user['created_at'].isoformat(),
-                    "note": user['bio'] or "",
-                    "url": f"https://example.com/users/{user['username']}",
-                    "avatar": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "avatar_static": user['avatar_url'] or "https://example.com/avatar.jpg",
-                    "header": user['header_url'] or "https://example.com/header.jpg",
-                    "header_static": user['header_url'] or "https://example.com/header.jpg",
-                    "followers_count": len(db.get_followers(user['id'])),
-                    "following_count": len(db.get_following(user['id'])),
-                    "statuses_count": len(db.get_user_statuses(user['id'])),
-                    "last_status_at": None,
-                    "emojis": [],
-                    "fields": []
-                },
-                "media_attachments": [
-                    {
-                        "id": media['id'],
-                        "type": media['file_type'],
-                        "url": media['url'],
-                        "preview_url": media['url'],
-                        "remote_url": None,
-                        "text_url": None,
-                        "description": media['description'] or None,
-                        "blurhash": None
-                    }
-                    for media in media_attachments
-                ],
-                "location": None
-            }
-            
-            # Add location if present
-            if db_status['latitude'] is not None and db_status['longitude'] is not None:
-                status["location"] = {
-                    "name": f"{db_status['latitude']}, {db_status['longitude']}",
-                    "type": "Point",
-                    "coordinates": [db_status['longitude'], db_status['latitude']]
-                }
-            
-            statuses.append(status)
-            
-        return statuses 
\ No newline at end of file
+
+        return self._serialize_statuses(db.get_user_statuses(user['id'], limit, since_id, max_id))
@@ -5,17 +5,36 @@ This module handles HTTP signature verification for ActivityPub.
 """
 
 import re
+import base64
+import functools
+import hashlib
 import logging
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives import serialization
 import requests
+from requests.adapters import HTTPAdapter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared session with keep-alive pooling: key fetches for the same remote
+# instances reuse warm connections instead of re-handshaking TLS each time
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+_SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+
+# Remote actors' keys rarely change, so cache the PEM bytes for an hour
+KEY_CACHE_TTL = 3600  # seconds
+_key_cache: Dict[str, Tuple[float, bytes]] = {}
+
+# Matches one signature parameter, quoted or bare; compiled once so the
+# inbound request path does a single C-level scan of the header
+_SIG_PARAM_RE = re.compile(r'(\w+)\s*=\s*(?:"([^"]*)"|([^,]+))')
+
 def parse_signature_header(header: str) -> Dict[str, str]:
     """
     Parse HTTP signature header.
@@ -26,11 +45,10 @@ def parse_signature_header(header: str) -> Dict[str, str]:
     Returns:
         Dictionary of signature parameters
     """
-    params = {}
-    for param in header.split(','):
-        key, value = param.split('=', 1)
-        params[key.strip()] = value.strip('"')
-    return params
+    return {
+        m.group(1): m.group(2) if m.group(2) is not None else m.group(3).strip()
+        for m in _SIG_PARAM_RE.finditer(header)
+    }
 
 def get_public_key(key_id: str) -> Optional[bytes]:
     """
@@ -42,16 +60,39 @@ def get_public_key(key_id: str) -> Optional[bytes]:
     Returns:
         Public key bytes
     """
+    cached = _key_cache.get(key_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     try:
-        response = requests.get(key_id)
+        response = _SESSION.get(key_id, timeout=5)
         if response.status_code == 200:
             data = response.json()
-            return data['publicKey']['publicKeyPem'].encode()
+            pem = data['publicKey']['publicKeyPem'].encode()
+            _key_cache[key_id] = (time.monotonic() + KEY_CACHE_TTL, pem)
+            return pem
         return None
     except Exception as e:
         logger.error(f"Failed to get public key: {e}")
         return None
 
+@functools.lru_cache(maxsize=4096)
+def _parse_public_key(pem: bytes):
+    """
+    Parse a PEM public key, memoized on the key bytes.
+
+    Keying on the bytes means repeat verifications from the same remote
+    actor skip the ASN.1 parse, while a rotated key (new PEM) is parsed
+    fresh automatically.
+
+    Args:
+        pem: PEM-encoded public key bytes
+
+    Returns:
+        Parsed public key object
+    """
+    return serialization.load_pem_public_key(pem)
+
 def verify_server_signature(request_body: bytes, signature_header: str,
                           date_header: str) -> bool:
     """
@@ -85,35 +126,43 @@ def verify_server_signature(request_body: bytes, signature_header: str,
             logger.error("Failed to get public key")
             return False
             
-        # Load public key
-        public_key = serialization.load_pem_public_key(public_key_pem)
+        # Load public key (parsed form cached across verifications)
+        public_key = _parse_public_key(public_key_pem)
         
-        # Create signature string
-        signature_string = ''
+        # Create signature string (collected parts, one final join)
+        parts = []
         for header in headers:
             if header == '(request-target)':
-                signature_string += '(request-target): post /inbox\n'
+                parts.append('(request-target): post /inbox')
             elif header == 'date':
-                signature_string += f'date: {date_header}\n'
+                parts.append(f'date: {date_header}')
             elif header == 'host':
-                signature_string += f'host: example.com\n'
+                parts.append('host: example.com')
             elif header == 'content-type':
-                signature_string += 'content-type: application/activity+json\n'
+                parts.append('content-type: application/activity+json')
             elif header == 'digest':
-                # Calculate digest
-                digest = hashes.Hash(hashes.SHA256())
-                digest.update(request_body)
-                digest_value = digest.finalize()
-                signature_string += f'digest: SHA-256={digest_value.hex()}\n'
-                
-        # Remove trailing newline
-        signature_string = signature_string.rstrip('\n')
-        
-        # Verify signature
+                # Calculate digest (hashlib goes straight to OpenSSL;
+                # the digest value is base64 per the HTTP signature spec)
+                digest_value = hashlib.sha256(request_body).digest()
+                parts.append('digest: SHA-256=' + base64.b64encode(digest_value).decode())
+
+        signature_string = '\n'.join(parts)
+
+        # Decode the signature once; peers send base64 per the HTTP
+        # signature spec. No hex fallback: a canonical hex signature
+        # decodes as base64 anyway, so the branch could never be reached
+        # by the senders it would be meant for.
+        try:
+            sig_bytes = base64.b64decode(signature, validate=True)
+        except Exception as e:
+            logger.error(f"Signature is not valid base64: {e}")
+            return False
+
+        # Verify signature (signed headers are ASCII by construction)
         try:
             public_key.verify(
-                bytes.fromhex(signature),
-                signature_string.encode(),
+                sig_bytes,
+                signature_string.encode('ascii'),
                 padding.PKCS1v15(),
                 hashes.SHA256()
             )
@@ -4,11 +4,18 @@ JWT Authentication
 This module handles JWT token creation and validation.
 """
 
+import asyncio
+import hashlib
 import logging
+import os
+import re
+import time
 from datetime import datetime, timedelta
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
 
 from ..database import db
 
@@ -16,13 +23,55 @@ from ..database import db
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# JWT configuration
-SECRET_KEY = "your-secret-key"  # In production, use a secure secret key
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+# The same bearer token is reused for its whole lifetime, so cache the
+# resolved (user, exp) per token and skip the decode + SELECT on repeats.
+# Keys are blake2b digests so raw tokens never sit in memory; entries
+# are still rejected once the token's own exp passes. The TTL is
+# overridable from the environment like the other JWT knobs.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv('AUTH_CACHE_TTL_SECONDS', '60'))
+_token_cache = TTLCache(maxsize=10000, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# Bad tokens are remembered only briefly, enough to absorb a storm of
+# retries without caching an invalid token for long
+_bad_token_cache = TTLCache(maxsize=10000, ttl=2)
+
+# User rows looked up on JWT-cache misses; hits skip the SELECT. Misses
+# are cached as a short-lived sentinel so lookups for nonexistent users
+# (an auth brute-force amplifier) don't hammer the database.
+_user_cache = TTLCache(maxsize=10000, ttl=30)
+_missing_user_cache = TTLCache(maxsize=10000, ttl=2)
+
+# Single-flight guard: one validation per token digest at a time; a
+# burst of concurrent requests with the same cold token awaits the one
+# in-flight result instead of each verifying independently
+_inflight = {}
+
+def _get_user_cached(username: str):
+    """Fetch a user with short-TTL positive and negative caching."""
+    user = _user_cache.get(username)
+    if user is not None:
+        return user
+    if username in _missing_user_cache:
+        return None
+    user = db.get_user(username)
+    if user is not None:
+        _user_cache[username] = user
+    else:
+        _missing_user_cache[username] = True
+    return user
+
+# JWT configuration, overridable from the environment like DATABASE_URL
+SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key')
+ALGORITHM = 'HS256'
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('JWT_EXPIRE_MINUTES', '30'))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Three base64url segments — the only shape a JWT can have. Anything
+# else is rejected before any hashing or decoding happens, so malformed
+# probe tokens cost one regex pass instead of base64 + JSON + HMAC work.
+_JWT_RE = re.compile(r'^[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+$')
+
 def create_access_token(data: dict):
     """
     Create a new JWT access token.
@@ -52,14 +101,54 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     Raises:
         HTTPException: If token is invalid or user not found
     """
+    if _JWT_RE.match(token) is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    if key in _bad_token_cache:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        user, exp = cached
+        if exp > time.time():
+            return user
+        _token_cache.pop(key, None)
+
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        return await inflight
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        # The user lookup inside may hit the database; keep it off the loop
+        user = await run_in_threadpool(_validate_token, token, key)
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+        # Consume the exception in case no waiter ever awaits it
+        future.exception()
+        raise
+    else:
+        future.set_result(user)
+        return user
+    finally:
+        _inflight.pop(key, None)
+
+def _validate_token(token: str, key: bytes):
+    """Decode a token, resolve its user, and fill the caches."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        user = db.get_user(username)
+        user = _get_user_cached(username)
         if user is None:
             raise HTTPException(status_code=401, detail="User not found")
+        _token_cache[key] = (user, payload.get("exp", 0))
         return user
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials") 
\ No newline at end of file
+    except jwt.InvalidTokenError:
+        _bad_token_cache[key] = True
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
\ No newline at end of file
@@ -4,9 +4,17 @@ Database Module
 This module provides database functionality for the Mastodon server.
 """
 
+from functools import lru_cache
+
 from server.database.connection import Database
 
-# Initialize database connection
-db = Database()
+@lru_cache(maxsize=1)
+def get_db() -> Database:
+    """Return the process-wide Database instance, creating it on first use."""
+    return Database()
+
+# Backwards-compatible module-level handle; every importer shares the
+# one pool instead of a second instance being built at import time
+db = get_db()
 
-__all__ = ['db'] 
\ No newline at end of file
+__all__ = ['Database', 'get_db', 'db']
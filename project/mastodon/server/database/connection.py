@@ -6,194 +6,506 @@ This module handles the database connection and core operations.
 
 import os
 import logging
+import weakref
 from typing import Dict, List, Optional
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from uuid import UUID
 import hashlib
+import hmac
+import secrets
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Connection pool bounds; a single shared connection serializes every
+# request, while a small pool lets concurrent handlers run in parallel
+POOL_MIN_CONN = 5
+POOL_MAX_CONN = 20
+
+# scrypt parameters: memory-hard and salted, unlike the old bare sha256,
+# tuned so a verification costs tens of milliseconds
+_SCRYPT_N = 2 ** 14
+_SCRYPT_R = 8
+_SCRYPT_P = 1
+
+def _hash_password(password: str) -> str:
+    """Hash a password with a fresh per-user salt using scrypt."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(
+        password.encode(), salt=salt,
+        n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P
+    )
+    return f"scrypt${salt.hex()}${digest.hex()}"
+
+def _verify_password(password: str, stored: str) -> bool:
+    """Check a password against a stored hash, accepting legacy sha256."""
+    if stored.startswith('scrypt$'):
+        _, salt_hex, digest_hex = stored.split('$', 2)
+        digest = hashlib.scrypt(
+            password.encode(), salt=bytes.fromhex(salt_hex),
+            n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P
+        )
+        return hmac.compare_digest(digest.hex(), digest_hex)
+    # Legacy unsalted sha256 rows, upgraded on next successful login
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+
+# Pinned column list for user reads: everything the serializers consume
+# and nothing more, so password_hash and email stay out of result sets
+# and row payloads over the wire stay small
+USER_COLS = (
+    "id, username, display_name, bio, avatar_url, header_url, "
+    "followers_count, following_count, statuses_count, created_at"
+)
+_USER_COLS_U = ", ".join(f"u.{col}" for col in USER_COLS.split(", "))
+
+# Same idea for the timeline joins: project only what the API returns,
+# leaving updated_at and place_name out of every row on the wire
+_STATUS_COLS_S = (
+    "s.id, s.user_id, s.content, s.visibility, s.sensitive, "
+    "s.spoiler_text, s.latitude, s.longitude, s.created_at"
+)
+
+_KEYSET_SINCE = " AND (s.created_at, s.id) > (SELECT created_at, id FROM statuses WHERE id = %s)"
+_KEYSET_MAX = " AND (s.created_at, s.id) < (SELECT created_at, id FROM statuses WHERE id = %s)"
+_KEYSET_ORDER = " ORDER BY s.created_at DESC, s.id DESC LIMIT %s"
+
+def _keyset_shapes(base: str, tail: str = "") -> Dict[tuple, str]:
+    """Precompute the four cursor shapes of a keyset-paginated query.
+
+    Timeline calls pick the finished string by (has_since, has_max)
+    instead of concatenating fragments and growing a params list on
+    every request. `tail` slots a GROUP BY between the cursor
+    predicates and the ORDER BY when the query aggregates.
+    """
+    return {
+        (False, False): base + tail + _KEYSET_ORDER,
+        (True, False): base + _KEYSET_SINCE + tail + _KEYSET_ORDER,
+        (False, True): base + _KEYSET_MAX + tail + _KEYSET_ORDER,
+        (True, True): base + _KEYSET_SINCE + _KEYSET_MAX + tail + _KEYSET_ORDER,
+    }
+
+def _keyset_params(head: tuple, since_id, max_id, limit: int) -> tuple:
+    """Assemble the fixed-size parameter tuple matching a cursor shape."""
+    if since_id:
+        return head + ((since_id, max_id, limit) if max_id else (since_id, limit))
+    return head + ((max_id, limit) if max_id else (limit,))
+
+# Hot point-lookup statements, prepared once per pooled connection so
+# the server parses and plans them a single time instead of per call
+_PREPARED_STATEMENTS = [
+    f"PREPARE get_user_by_username AS SELECT {USER_COLS} FROM users WHERE username = $1",
+    f"PREPARE get_user_by_id AS SELECT {USER_COLS} FROM users WHERE id = $1",
+    """PREPARE get_status_media AS
+       SELECT id, file_path as url, file_type, description
+       FROM media_attachments
+       WHERE status_id = $1""",
+    """PREPARE create_status AS
+       INSERT INTO statuses (user_id, content, visibility, sensitive, spoiler_text, latitude, longitude)
+       VALUES ($1, $2, $3, $4, $5, $6, $7)
+       RETURNING *""",
+    """PREPARE create_media_attachment AS
+       INSERT INTO media_attachments (status_id, file_path, file_type, description)
+       VALUES ($1, $2, $3, $4)
+       RETURNING *""",
+]
+
+def _as_prepare(name: str, sql: str) -> str:
+    """Rewrite a %s-parameterized query as a named PREPARE statement."""
+    parts = sql.split("%s")
+    body = parts[0]
+    for i, part in enumerate(parts[1:], start=1):
+        body += f"${i}" + part
+    return f"PREPARE {name} AS {body}"
+
+# Cursor-shape suffixes for prepared timeline statement names
+_SHAPE_SUFFIX = {
+    (False, False): "first",
+    (True, False): "since",
+    (False, True): "max",
+    (True, True): "since_max",
+}
+
+def _prepared_family(name: str, shapes: Dict[tuple, str]) -> Dict[tuple, str]:
+    """Register a keyset query family as server-side prepared statements.
+
+    Each cursor shape becomes one named PREPARE on the per-connection
+    setup list; the returned dict maps the same shape keys to matching
+    EXECUTE strings, so timeline calls skip parse and plan entirely.
+    """
+    executes = {}
+    for key, sql in shapes.items():
+        stmt = f"{name}_{_SHAPE_SUFFIX[key]}"
+        _PREPARED_STATEMENTS.append(_as_prepare(stmt, sql))
+        executes[key] = f"EXECUTE {stmt} ({', '.join(['%s'] * sql.count('%s'))})"
+    return executes
+
+_PUBLIC_TIMELINE_SQL = _prepared_family("public_timeline", _keyset_shapes(f"""
+    SELECT {_STATUS_COLS_S}, u.username as username
+    FROM statuses s
+    JOIN users u ON s.user_id = u.id
+    WHERE s.visibility = 'public'
+"""))
+
+_HASHTAG_TIMELINE_SQL = _prepared_family("hashtag_timeline", _keyset_shapes(f"""
+    SELECT {_STATUS_COLS_S}, u.username as username
+    FROM statuses s
+    JOIN users u ON s.user_id = u.id
+    JOIN status_hashtags sh ON s.id = sh.status_id
+    JOIN hashtags h ON sh.hashtag_id = h.id
+    WHERE h.name = %s
+"""))
+
+_USER_TIMELINE_SQL = _prepared_family("user_timeline", _keyset_shapes(f"""
+    SELECT {_STATUS_COLS_S}, u.username as username
+    FROM statuses s
+    JOIN users u ON s.user_id = u.id
+    WHERE s.user_id = %s
+"""))
+
+# Author and media bundled into JSON columns so a timeline page is one
+# round trip; the account object carries the pinned user columns only
+_USER_JSON_FIELDS = ", ".join(f"'{col}', u.{col}" for col in USER_COLS.split(", "))
+
+_PUBLIC_TIMELINE_DETAILS_SQL = _prepared_family("public_timeline_details", _keyset_shapes(f"""
+    SELECT {_STATUS_COLS_S}, u.username as username,
+           json_build_object({_USER_JSON_FIELDS}) AS account,
+           COALESCE(json_agg(json_build_object(
+               'id', m.id,
+               'type', m.file_type,
+               'url', m.file_path,
+               'description', m.description
+           )) FILTER (WHERE m.id IS NOT NULL), '[]') AS media
+    FROM statuses s
+    JOIN users u ON s.user_id = u.id
+    LEFT JOIN media_attachments m ON m.status_id = s.id
+    WHERE s.visibility = 'public'
+""", tail=" GROUP BY s.id, u.id"))
+
 class Database:
     """Database connection and operations handler."""
-    
+
     def __init__(self):
-        """Initialize database connection."""
+        """Initialize database connection pool."""
         # Get database URL from environment or use default for insecure local setup
         self.db_url = os.getenv('DATABASE_URL', 'postgresql://root@localhost:26257/mastodon?sslmode=disable')
-        self.conn = None
+        self.pool = None
+        # Pooled connections that already hold the prepared statements.
+        # Weak references, so an entry vanishes with its connection when
+        # the pool closes one — tracking by id() would let a recycled
+        # address masquerade as already-prepared and poison every
+        # EXECUTE on the fresh connection.
+        self._prepared = weakref.WeakSet()
         self.connect()
-        
+
     def connect(self):
-        """Establish database connection."""
+        """Establish the database connection pool."""
         try:
-            self.conn = psycopg2.connect(self.db_url, cursor_factory=RealDictCursor)
-            logger.info("Connected to database")
+            self.pool = ThreadedConnectionPool(
+                POOL_MIN_CONN, POOL_MAX_CONN, self.db_url,
+                cursor_factory=RealDictCursor
+            )
+            logger.info(f"Connected to database (pool of {POOL_MIN_CONN}-{POOL_MAX_CONN} connections)")
         except Exception as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
-            
+
+    def _getconn(self):
+        """Check a connection out of the pool, validating it first."""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+        except psycopg2.Error:
+            # Stale connection (server restart, idle timeout) — discard
+            # it and hand out a fresh one
+            self._prepared.discard(conn)
+            self.pool.putconn(conn, close=True)
+            conn = self.pool.getconn()
+
+        if conn not in self._prepared:
+            with conn.cursor() as cur:
+                for statement in _PREPARED_STATEMENTS:
+                    cur.execute(statement)
+            conn.commit()
+            self._prepared.add(conn)
+        return conn
+
     def execute(self, query: str, params: tuple = None, fetch_one=False) -> Optional[List[Dict]] | Optional[Dict]:
         """
-        Execute a database query.
-        
+        Execute a database query on a pooled connection.
+
         Args:
             query: SQL query to execute
             params: Query parameters
             fetch_one: Whether to fetch only one row
-            
+
         Returns:
             List of results as dictionaries, a single dictionary if fetch_one=True, or None
         """
+        conn = self._getconn()
         try:
-            with self.conn.cursor() as cur:
+            with conn.cursor() as cur:
                 cur.execute(query, params)
                 if cur.description:
-                    if fetch_one:
-                        return cur.fetchone()
-                    return cur.fetchall()
-                # For INSERT/UPDATE/DELETE without RETURNING
-                self.conn.commit()
-                return None # Indicate success for commit operations
+                    result = cur.fetchone() if fetch_one else cur.fetchall()
+                else:
+                    # For INSERT/UPDATE/DELETE without RETURNING
+                    result = None
+                # Always settle the transaction before the connection
+                # goes back to the pool
+                conn.commit()
+                return result
         except psycopg2.Error as e:
             logger.error(f"Database query failed: {e}")
-            self.conn.rollback()
+            conn.rollback()
             raise
         except Exception as e:
             logger.error(f"An unexpected error occurred during query execution: {e}")
-            self.conn.rollback()
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def execute_batch(self, query: str, params_list: List[tuple], page_size: int = 100) -> None:
+        """
+        Execute one statement for many parameter tuples in a single round trip.
+
+        psycopg2's execute_batch pipelines the statements over the wire, so
+        N executions cost one network exchange (per page) and one commit
+        instead of N cursor round trips and N WAL flushes.
+
+        Args:
+            query: SQL statement with placeholders
+            params_list: Sequence of parameter tuples, one per execution
+            page_size: Statements pipelined per server exchange
+        """
+        if not params_list:
+            return
+        conn = self._getconn()
+        try:
+            with conn.cursor() as cur:
+                execute_batch(cur, query, params_list, page_size=page_size)
+            conn.commit()
+        except psycopg2.Error as e:
+            logger.error(f"Batch execution failed: {e}")
+            conn.rollback()
             raise
-            
+        finally:
+            self.pool.putconn(conn)
+
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            logger.info("Closed database connection")
+        """Close all pooled database connections."""
+        if self.pool:
+            self.pool.closeall()
+            logger.info("Closed database connection pool")
 
     # --- User Methods ---
     def get_user(self, username: str) -> Optional[Dict]:
         """Fetch a user by username."""
-        query = "SELECT * FROM users WHERE username = %s"
-        return self.execute(query, (username,), fetch_one=True)
+        return self.execute("EXECUTE get_user_by_username(%s)", (username,), fetch_one=True)
+
+    def get_user_with_counts(self, username: str) -> Optional[Dict]:
+        """Fetch a user including their profile counts.
+
+        The counts are denormalized columns on users, maintained by
+        triggers, so this is a single-row point lookup however large the
+        follower graph is.
+        """
+        return self.get_user(username)
 
     def get_user_by_id(self, user_id: UUID) -> Optional[Dict]:
         """Fetch a user by ID."""
-        query = "SELECT * FROM users WHERE id = %s"
-        return self.execute(query, (user_id,), fetch_one=True)
+        return self.execute("EXECUTE get_user_by_id(%s)", (user_id,), fetch_one=True)
 
-    def create_user(self, username: str, password_hash: str, email: str) -> Optional[Dict]:
-        """Create a new user and return their data."""
-        # TODO: Add proper password hashing before storing
-        query = """
+    def create_user(self, username: str, password: str, email: str) -> Optional[Dict]:
+        """Create a new user with a salted password hash and return their data."""
+        query = f"""
             INSERT INTO users (username, password_hash, email)
             VALUES (%s, %s, %s)
-            RETURNING *;
+            RETURNING {USER_COLS};
         """
-        # In production, hash the password before passing it here
-        return self.execute(query, (username, password_hash, email), fetch_one=True)
+        return self.execute(query, (username, _hash_password(password), email), fetch_one=True)
+
+    def upsert_user(self, username: str, display_name: Optional[str] = None, bio: str = "",
+                    avatar_url: Optional[str] = None, header_url: Optional[str] = None) -> Optional[Dict]:
+        """Fetch a user by username, creating them atomically if missing."""
+        query = f"""
+            INSERT INTO users (username, password_hash, email, display_name, bio, avatar_url, header_url)
+            VALUES (%s, '', '', %s, %s, %s, %s)
+            ON CONFLICT (username) DO UPDATE SET username = EXCLUDED.username
+            RETURNING {USER_COLS};
+        """
+        return self.execute(
+            query,
+            (username, display_name or username, bio, avatar_url, header_url),
+            fetch_one=True
+        )
 
     def verify_user(self, username: str, password: str) -> Optional[Dict]:
         """Verify user credentials and return user data if valid."""
-        # Hash the password before comparison
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        query = "SELECT * FROM users WHERE username = %s AND password_hash = %s"
-        return self.execute(query, (username, password_hash), fetch_one=True)
+        # get_user deliberately omits password_hash, so fetch it here
+        user = self.execute(
+            f"SELECT {USER_COLS}, password_hash FROM users WHERE username = %s",
+            (username,), fetch_one=True
+        )
+        if not user or not _verify_password(password, user['password_hash']):
+            return None
+        # Migrate legacy sha256 rows to scrypt on successful login
+        if not user['password_hash'].startswith('scrypt$'):
+            self.execute(
+                "UPDATE users SET password_hash = %s WHERE id = %s",
+                (_hash_password(password), user['id'])
+            )
+        del user['password_hash']
+        return user
 
     # --- Status Methods ---
     def create_status(self, user_id: UUID, content: str, visibility: str, sensitive: bool, spoiler_text: Optional[str], latitude: Optional[float], longitude: Optional[float]) -> Optional[Dict]:
         """Create a new status and return its data."""
-        query = """
-            INSERT INTO statuses (user_id, content, visibility, sensitive, spoiler_text, latitude, longitude)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING *;
-        """
-        return self.execute(query, (user_id, content, visibility, sensitive, spoiler_text, latitude, longitude), fetch_one=True)
+        return self.execute(
+            "EXECUTE create_status(%s, %s, %s, %s, %s, %s, %s)",
+            (user_id, content, visibility, sensitive, spoiler_text, latitude, longitude),
+            fetch_one=True
+        )
 
     def get_public_timeline(self, limit: int, since_id: Optional[str], max_id: Optional[str]) -> List[Dict]:
-        """Fetch public timeline statuses."""
-        query = """
-            SELECT s.*, u.username as username
-            FROM statuses s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.visibility = 'public'
+        """Fetch public timeline statuses via keyset pagination.
+
+        The id cursors are translated to (created_at, id) positions so the
+        planner can walk the composite index instead of sorting the whole
+        remaining range — status ids are UUIDs and carry no time order of
+        their own.
         """
-        params = []
-        if since_id:
-            query += " AND s.id > %s"
-            params.append(since_id)
-        if max_id:
-            query += " AND s.id < %s"
-            params.append(max_id)
+        query = _PUBLIC_TIMELINE_SQL[(bool(since_id), bool(max_id))]
+        return self.execute(query, _keyset_params((), since_id, max_id, limit))
 
-        query += " ORDER BY s.created_at DESC LIMIT %s"
-        params.append(limit)
+    def get_public_timeline_with_details(self, limit: int, since_id: Optional[str], max_id: Optional[str]) -> List[Dict]:
+        """Fetch the public timeline with author and media in one query.
 
-        return self.execute(query, tuple(params))
+        The author lands in an `account` JSON column and the attachments
+        in a `media` JSON array, so a page render costs a single round
+        trip instead of a statuses query plus bulk user/media fetches.
+        """
+        query = _PUBLIC_TIMELINE_DETAILS_SQL[(bool(since_id), bool(max_id))]
+        return self.execute(query, _keyset_params((), since_id, max_id, limit))
 
     def get_hashtag_timeline(self, hashtag: str, limit: int, since_id: Optional[str], max_id: Optional[str]) -> List[Dict]:
         """Fetch statuses for a specific hashtag."""
-        query = """
-            SELECT s.*, u.username as username
-            FROM statuses s
-            JOIN users u ON s.user_id = u.id
-            JOIN status_hashtags sh ON s.id = sh.status_id
-            JOIN hashtags h ON sh.hashtag_id = h.id
-            WHERE h.name = %s
-        """
-        params = [hashtag]
-        if since_id:
-            query += " AND s.id > %s"
-            params.append(since_id)
-        if max_id:
-            query += " AND s.id < %s"
-            params.append(max_id)
-
-        query += " ORDER BY s.created_at DESC LIMIT %s"
-        params.append(limit)
-
-        return self.execute(query, tuple(params))
+        # Tags are lowercased at write time; match that here so
+        # #Python finds the rows stored as "python"
+        query = _HASHTAG_TIMELINE_SQL[(bool(since_id), bool(max_id))]
+        return self.execute(query, _keyset_params((hashtag.lower(),), since_id, max_id, limit))
 
     def get_user_statuses(self, user_id: UUID, limit: int, since_id: Optional[str], max_id: Optional[str]) -> List[Dict]:
         """Fetch statuses for a specific user."""
+        query = _USER_TIMELINE_SQL[(bool(since_id), bool(max_id))]
+        return self.execute(query, _keyset_params((user_id,), since_id, max_id, limit))
+
+    # --- Count Methods ---
+    def count_followers(self, user_id: UUID) -> int:
+        """Count users following the given user."""
+        query = """
+            SELECT COUNT(*) AS count
+            FROM relationships
+            WHERE following_id = %s AND relationship_type = 'follow'
+        """
+        row = self.execute(query, (user_id,), fetch_one=True)
+        return row['count'] if row else 0
+
+    def count_following(self, user_id: UUID) -> int:
+        """Count users the given user is following."""
         query = """
-            SELECT s.*, u.username as username
-            FROM statuses s
-            JOIN users u ON s.user_id = u.id
-            WHERE s.user_id = %s
+            SELECT COUNT(*) AS count
+            FROM relationships
+            WHERE follower_id = %s AND relationship_type = 'follow'
         """
-        params = [user_id]
-        if since_id:
-            query += " AND s.id > %s"
-            params.append(since_id)
-        if max_id:
-            query += " AND s.id < %s"
-            params.append(max_id)
+        row = self.execute(query, (user_id,), fetch_one=True)
+        return row['count'] if row else 0
 
-        query += " ORDER BY s.created_at DESC LIMIT %s"
-        params.append(limit)
+    def count_statuses(self, user_id: UUID) -> int:
+        """Count statuses posted by the given user."""
+        query = "SELECT COUNT(*) AS count FROM statuses WHERE user_id = %s"
+        row = self.execute(query, (user_id,), fetch_one=True)
+        return row['count'] if row else 0
 
-        return self.execute(query, tuple(params))
+    # --- Bulk Read Methods ---
+    def get_users_by_ids(self, user_ids) -> Dict:
+        """Fetch multiple users in one query, keyed by user ID."""
+        if not user_ids:
+            return {}
+        query = f"SELECT {USER_COLS} FROM users WHERE id = ANY(%s)"
+        rows = self.execute(query, (list(user_ids),))
+        return {row['id']: row for row in rows}
+
+    def get_status_media_bulk(self, status_ids) -> Dict:
+        """Fetch media attachments for many statuses, keyed by status ID."""
+        if not status_ids:
+            return {}
+        query = """
+            SELECT status_id, id, file_path as url, file_type, description
+            FROM media_attachments
+            WHERE status_id = ANY(%s);
+        """
+        media_by_status = {}
+        for row in self.execute(query, (list(status_ids),)):
+            media_by_status.setdefault(row['status_id'], []).append(row)
+        return media_by_status
+
+    def get_follower_counts(self, user_ids) -> Dict:
+        """Count followers for many users in one query, keyed by user ID."""
+        if not user_ids:
+            return {}
+        query = """
+            SELECT following_id, COUNT(*) AS count
+            FROM relationships
+            WHERE following_id = ANY(%s) AND relationship_type = 'follow'
+            GROUP BY following_id
+        """
+        rows = self.execute(query, (list(user_ids),))
+        return {row['following_id']: row['count'] for row in rows}
+
+    def get_following_counts(self, user_ids) -> Dict:
+        """Count followed users for many users in one query, keyed by user ID."""
+        if not user_ids:
+            return {}
+        query = """
+            SELECT follower_id, COUNT(*) AS count
+            FROM relationships
+            WHERE follower_id = ANY(%s) AND relationship_type = 'follow'
+            GROUP BY follower_id
+        """
+        rows = self.execute(query, (list(user_ids),))
+        return {row['follower_id']: row['count'] for row in rows}
+
+    def get_status_counts(self, user_ids) -> Dict:
+        """Count statuses for many users in one query, keyed by user ID."""
+        if not user_ids:
+            return {}
+        query = """
+            SELECT user_id, COUNT(*) AS count
+            FROM statuses
+            WHERE user_id = ANY(%s)
+            GROUP BY user_id
+        """
+        rows = self.execute(query, (list(user_ids),))
+        return {row['user_id']: row['count'] for row in rows}
 
     # --- Media Methods ---
     def create_media_attachment(self, file_path: str, file_type: str, description: Optional[str] = None, status_id: Optional[UUID] = None) -> Optional[Dict]:
         """Create a new media attachment."""
-        query = """
-            INSERT INTO media_attachments (status_id, file_path, file_type, description)
-            VALUES (%s, %s, %s, %s)
-            RETURNING *;
-        """
-        return self.execute(query, (status_id, file_path, file_type, description), fetch_one=True)
+        return self.execute(
+            "EXECUTE create_media_attachment(%s, %s, %s, %s)",
+            (status_id, file_path, file_type, description),
+            fetch_one=True
+        )
 
     def get_status_media(self, status_id: UUID) -> List[Dict]:
         """Fetch media attachments for a given status."""
-        query = """
-            SELECT id, file_path as url, file_type, description
-            FROM media_attachments
-            WHERE status_id = %s;
-        """
-        return self.execute(query, (status_id,))
+        return self.execute("EXECUTE get_status_media(%s)", (status_id,))
 
     def update_media_status(self, media_id: str, status_id: UUID) -> Optional[Dict]:
         """Update the status_id of a media attachment."""
@@ -206,11 +518,28 @@ class Database:
         result = self.execute(query, (status_id, media_id), fetch_one=True)
         return result
 
+    def update_media_statuses(self, media_ids: List[str], status_id: UUID) -> List[Dict]:
+        """Attach many media attachments to a status in one statement.
+
+        One UPDATE ... WHERE id = ANY(...) replaces a round trip per
+        attachment; callers can diff the returned ids against the input
+        to spot ids that matched nothing.
+        """
+        if not media_ids:
+            return []
+        query = """
+            UPDATE media_attachments
+            SET status_id = %s
+            WHERE id::text = ANY(%s)
+            RETURNING id, file_path as url, file_type, description;
+        """
+        return self.execute(query, (status_id, list(media_ids)))
+
     # --- Relationship Methods ---
     def get_followers(self, user_id: UUID) -> List[Dict]:
         """Get list of users following the given user."""
-        query = """
-            SELECT u.*
+        query = f"""
+            SELECT {_USER_COLS_U}
             FROM users u
             JOIN relationships r ON u.id = r.follower_id
             WHERE r.following_id = %s AND r.relationship_type = 'follow'
@@ -219,14 +548,66 @@ class Database:
 
     def get_following(self, user_id: UUID) -> List[Dict]:
         """Get list of users the given user is following."""
-        query = """
-            SELECT u.*
+        query = f"""
+            SELECT {_USER_COLS_U}
             FROM users u
             JOIN relationships r ON u.id = r.following_id
             WHERE r.follower_id = %s AND r.relationship_type = 'follow'
         """
         return self.execute(query, (user_id,))
 
+    def follow_users(self, follower_id: UUID, following_ids: List[UUID]) -> None:
+        """Create follow relationships to many users in one statement.
+
+        Fanning the target list through unnest keeps an N-target follow
+        at a single round trip and one WAL flush instead of N inserts.
+        """
+        if not following_ids:
+            return
+        query = """
+            INSERT INTO relationships (follower_id, following_id, relationship_type)
+            SELECT %s, unnest(%s::uuid[]), 'follow'
+            ON CONFLICT DO NOTHING;
+        """
+        self.execute(query, (follower_id, [str(fid) for fid in following_ids]))
+
+    def get_profile(self, user_id: UUID) -> Optional[Dict]:
+        """Fetch followers, following and recent statuses in one query.
+
+        Postgres aggregates all three lists with a single plan and one
+        round trip instead of three separate queries and cursor
+        materializations.
+        """
+        # Aggregate only the pinned user columns — json_agg over the
+        # whole row would ship password_hash and email in the profile
+        query = f"""
+            SELECT json_build_object(
+                'followers', (
+                    SELECT COALESCE(json_agg(json_build_object({_USER_JSON_FIELDS})), '[]'::json)
+                    FROM users u
+                    JOIN relationships r ON u.id = r.follower_id
+                    WHERE r.following_id = %s AND r.relationship_type = 'follow'
+                ),
+                'following', (
+                    SELECT COALESCE(json_agg(json_build_object({_USER_JSON_FIELDS})), '[]'::json)
+                    FROM users u
+                    JOIN relationships r ON u.id = r.following_id
+                    WHERE r.follower_id = %s AND r.relationship_type = 'follow'
+                ),
+                'statuses', (
+                    SELECT COALESCE(json_agg(s), '[]'::json)
+                    FROM (
+                        SELECT * FROM statuses
+                        WHERE user_id = %s
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT 20
+                    ) s
+                )
+            ) AS profile
+        """
+        row = self.execute(query, (user_id, user_id, user_id), fetch_one=True)
+        return row['profile'] if row else None
+
     # --- Hashtag Methods ---
     def create_hashtag(self, name: str) -> Optional[Dict]:
         """Create a new hashtag if it doesn't exist."""
@@ -247,5 +628,45 @@ class Database:
         """
         return self.execute(query, (status_id, hashtag_id))
 
-# Instantiate the database connection globally
-db = Database() 
\ No newline at end of file
+    def attach_hashtags(self, status_id: UUID, names: List[str]) -> None:
+        """Create hashtags and link them to a status in two statements.
+
+        Replaces the per-tag create/link pair (2N round trips for N tags)
+        with one batched upsert and one batched link insert.
+        """
+        # Normalize and dedupe first: hashtags are case-insensitive, and
+        # a repeated tag in one status would make the upsert hit the
+        # same conflicting row twice within a single statement
+        names = list({name.lower() for name in names})
+        if not names:
+            return
+        conn = self._getconn()
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                    INSERT INTO hashtags (name)
+                    VALUES %s
+                    ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+                    RETURNING id
+                    """,
+                    [(name,) for name in names],
+                    fetch=True
+                )
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO status_hashtags (status_id, hashtag_id)
+                    VALUES %s
+                    ON CONFLICT DO NOTHING
+                    """,
+                    [(status_id, row['id']) for row in rows]
+                )
+            conn.commit()
+        except psycopg2.Error as e:
+            logger.error(f"Failed to attach hashtags: {e}")
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
@@ -5,33 +5,83 @@ This module provides functions for searching places using the geopy library.
 """
 
 import asyncio
+from cachetools import TTLCache
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
 from typing import Dict, Optional, Union
 
+# Geocoding answers barely change, so hits can live a day; misses are
+# kept briefly so typos don't burn the Nominatim rate limit on retries
+PLACE_CACHE_TTL = 86400
+PLACE_NEG_CACHE_TTL = 600
+
 class LocationService:
     """Service for handling geolocation functionality."""
-    
+
     def __init__(self):
         """Initialize the location service with a geocoder."""
         self.geocoder = Nominatim(user_agent="mastodon_location_service")
-    
+        self._cache = TTLCache(maxsize=10000, ttl=PLACE_CACHE_TTL)
+        self._neg_cache = TTLCache(maxsize=10000, ttl=PLACE_NEG_CACHE_TTL)
+        # Single-flight guard: concurrent lookups for the same query
+        # await one geocoder call instead of each going to Nominatim
+        self._inflight = {}
+
     async def search_place(self, query: str) -> Optional[Dict[str, Union[str, float, Dict]]]:
         """
         Search for a place by name or address.
-        
+
+        Results are cached by normalized query — positive hits for a day,
+        misses for ten minutes — and concurrent identical lookups share a
+        single geocoder round trip, since Nominatim is both slow and
+        rate-limited.
+
         Args:
             query: The place name or address to search for.
-            
+
         Returns:
             A dictionary containing place information or None if not found.
         """
+        q = query.strip().casefold()
+
+        place = self._cache.get(q)
+        if place is not None:
+            return place
+        if q in self._neg_cache:
+            return None
+
+        inflight = self._inflight.get(q)
+        if inflight is not None:
+            return await inflight
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[q] = future
+        try:
+            place = await self._geocode(query)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            # Consume the exception in case no waiter ever awaits it
+            future.exception()
+            raise
+        else:
+            if place is not None:
+                self._cache[q] = place
+            else:
+                self._neg_cache[q] = True
+            future.set_result(place)
+            return place
+        finally:
+            self._inflight.pop(q, None)
+
+    async def _geocode(self, query: str) -> Optional[Dict[str, Union[str, float, Dict]]]:
+        """Run the geocoder in a thread pool and shape the result."""
         try:
             # Run geocoding in a thread pool to avoid blocking
             location = await asyncio.get_event_loop().run_in_executor(
                 None, self.geocoder.geocode, query
             )
-            
+
             if location:
                 return {
                     'name': location.address,
@@ -40,7 +90,7 @@ class LocationService:
                     'raw': location.raw
                 }
             return None
-            
+
         except (GeocoderTimedOut, GeocoderUnavailable) as e:
             print(f"Geocoding error: {e}")
-            return None 
\ No newline at end of file
+            return None
@@ -9,25 +9,39 @@ It provides endpoints for:
 4. HTTP signature verification
 """
 
+import asyncio
 import os
 import json
+import hashlib
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import List, Optional
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from pathlib import Path
+from cachetools import TTLCache
 import uvicorn
+import orjson
 import re
-from jose import JWTError, jwt
 import uuid
 
-from server.activitypub import Actor, Inbox, Outbox, verify_server_signature
+try:
+    # uvloop is markedly faster than the stdlib loop for socket-heavy
+    # workloads; fall back silently where the wheel isn't installed
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
+
+from server.activitypub import Actor, Inbox, Outbox, verify_server_signature, begin_actor_cache, end_actor_cache
 from server.database import db
-from server.auth import Token, LoginRequest, AccountCreate, create_access_token, get_current_user
+from server.auth import LoginRequest, AccountCreate, create_access_token, get_current_user
 from server.location import LocationService
 
 # Configure logging
@@ -35,17 +49,34 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
-app = FastAPI(title="Mastodon Server")
+# orjson serializes responses in C and handles datetime/UUID natively,
+# so every endpoint that returns a plain dict skips the stdlib encoder
+app = FastAPI(title="Mastodon Server", default_response_class=ORJSONResponse)
 
-# Add CORS middleware
+# Add CORS middleware. Origins come from the environment like the other
+# deployment knobs; pinning them (and the method/header lists) keeps the
+# per-request header inspection to a handful of exact comparisons, and
+# lets preflight responses be cached client-side for a day.
+ALLOWED_ORIGINS = os.getenv('ALLOWED_ORIGINS', '*').split(',')
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type"],
+    max_age=86400,
 )
 
+# Upload streaming granularity: the memory ceiling per in-flight upload
+# and the unit of work per threadpool write
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+# Compiled once at import so the publish path skips the re-cache lookup
+_HASHTAG_RE = re.compile(r'#(\w+)')
+
+# Anchored acct: form with exactly one "@", per RFC 7033
+_WEBFINGER_RE = re.compile(r'^acct:([^@]+)@([^@]+)$')
+
 # Mount media directory
 MEDIA_DIR = Path("media")
 MEDIA_DIR.mkdir(exist_ok=True)
@@ -57,6 +88,97 @@ inbox = Inbox()
 outbox = Outbox()
 location_service = LocationService()
 
+@app.middleware("http")
+async def actor_cache_middleware(request: Request, call_next):
+    """Give each request its own Actor cache.
+
+    Repeated Actor(username) constructions inside one handler reuse the
+    already-hydrated state instead of reloading from the database.
+    """
+    token = begin_actor_cache()
+    try:
+        return await call_next(request)
+    finally:
+        end_actor_cache(token)
+
+@app.on_event("shutdown")
+async def close_db_pool():
+    """Release pooled database connections when the server stops."""
+    db.close()
+
+# Short-lived cache for timeline GETs: most clients poll the same window
+# repeatedly, so serve repeats from memory and 304 on a matching ETag.
+TIMELINE_CACHE_TTL = 30  # seconds
+TIMELINE_CACHE_MAX = 256
+_timeline_cache = {}  # key -> (expires_at, etag, body_bytes)
+
+def _timeline_cache_get(key):
+    """Return a fresh (expires_at, etag, body_bytes) entry or None."""
+    entry = _timeline_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return entry
+    _timeline_cache.pop(key, None)
+    return None
+
+def _timeline_cache_put(key, payload):
+    """Serialize and cache a timeline payload, returning (etag, body_bytes).
+
+    orjson handles the UUID and datetime values from the database natively,
+    so the payload is encoded once here and the bytes are reused for every
+    cache hit instead of re-running a full encoder traversal per request.
+    """
+    if len(_timeline_cache) >= TIMELINE_CACHE_MAX:
+        _timeline_cache.pop(next(iter(_timeline_cache)))
+    body = orjson.dumps(payload)
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    _timeline_cache[key] = (time.monotonic() + TIMELINE_CACHE_TTL, etag, body)
+    return etag, body
+
+# Single-flight guard: concurrent cache misses for the same timeline
+# window share one build instead of each querying the database
+_timeline_inflight = {}
+
+async def _timeline_build(cache_key, build):
+    """Return (etag, body) for a timeline window, building it at most once.
+
+    Cache hits return immediately; on a miss the first caller runs the
+    build function while concurrent callers for the same key await its
+    result, so a thundering herd costs one set of queries.
+    """
+    cached = _timeline_cache_get(cache_key)
+    if cached:
+        return cached[1], cached[2]
+
+    inflight = _timeline_inflight.get(cache_key)
+    if inflight is not None:
+        return await inflight
+
+    future = asyncio.get_running_loop().create_future()
+    _timeline_inflight[cache_key] = future
+    try:
+        result = _timeline_cache_put(cache_key, await build())
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+        # Consume the exception in case no waiter ever awaits it
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _timeline_inflight.pop(cache_key, None)
+
+def _timeline_response(request: Request, etag: str, body: bytes) -> Response:
+    """Build a timeline response, answering 304 on a matching If-None-Match."""
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": f"max-age={TIMELINE_CACHE_TTL}"}
+    )
+
 class StatusCreate(BaseModel):
     """Model for status creation request."""
     status: str
@@ -67,6 +189,26 @@ class StatusCreate(BaseModel):
     place_name: Optional[str] = None
     visibility: str = "public"
 
+# User rows keyed by username for the read-mostly lookup endpoints
+# (webfinger, account fetch, user timeline); hits skip the SELECT
+# entirely. Misses are not cached so a fresh signup shows up at once.
+_user_by_name_cache = TTLCache(maxsize=10000, ttl=60)
+
+def _cached_get_user(username: str) -> Optional[dict]:
+    """Fetch a user row by name through a short-TTL cache."""
+    user = _user_by_name_cache.get(username)
+    if user is None:
+        user = db.get_user(username)
+        if user is not None:
+            _user_by_name_cache[username] = user
+    return user
+
+# Formatted account dicts keyed by user id. The same handful of users
+# dominates every timeline page, so the string formatting and fallback
+# logic run once per user per minute instead of once per status. The
+# short TTL keeps profile edits and count changes from going stale.
+_account_cache = TTLCache(maxsize=4096, ttl=60)
+
 def format_account(user: dict) -> dict:
     """
     Format user data into a Mastodon account object.
@@ -77,7 +219,13 @@ def format_account(user: dict) -> dict:
     Returns:
         Formatted account dict
     """
-    return {
+    account = _account_cache.get(user['id'])
+    if account is not None:
+        # Shallow copy so a caller mutating its response can't poison
+        # the cached dict for everyone else; still far cheaper than
+        # rebuilding the f-strings and fallbacks
+        return account.copy()
+    account = {
         "id": f"/users/{user['username']}",
         "username": user['username'],
         "acct": user['username'],
@@ -86,20 +234,75 @@ def format_account(user: dict) -> dict:
         "bot": False,
         "discoverable": True,
         "group": False,
-        "created_at": user['created_at'].isoformat(),
+        "created_at": user['created_at'],
         "note": user['bio'] or "",
         "url": f"https://example.com/users/{user['username']}",
         "avatar": user['avatar_url'] or "https://example.com/avatar.jpg",
         "avatar_static": user['avatar_url'] or "https://example.com/avatar.jpg",
         "header": user['header_url'] or "https://example.com/header.jpg",
         "header_static": user['header_url'] or "https://example.com/header.jpg",
-        "followers_count": len(db.get_followers(user['id'])) if 'id' in user else 0,
-        "following_count": len(db.get_following(user['id'])) if 'id' in user else 0,
-        "statuses_count": len(db.get_user_statuses(user['id'], limit=20, since_id=None, max_id=None)) if 'id' in user else 0,
+        # The denormalized count columns ride along on the user row, so
+        # rendering an account costs zero extra queries instead of three
+        # full-row fetches that only fed len()
+        "followers_count": user.get('followers_count', 0),
+        "following_count": user.get('following_count', 0),
+        "statuses_count": user.get('statuses_count', 0),
         "last_status_at": None,
         "emojis": [],
         "fields": []
     }
+    _account_cache[user['id']] = account
+    return account.copy()
+
+def _status_payload(db_status: dict, account: dict, media_attachments: list) -> dict:
+    """
+    Shape one status row into Mastodon format.
+
+    All three timeline builders funnel through this helper, so the
+    ~30-key dict literal lives in one place instead of three copies.
+
+    Args:
+        db_status: Status row from the database
+        account: Formatted account dict for the author
+        media_attachments: Media rows for the status
+
+    Returns:
+        Status dict in Mastodon format
+    """
+    return {
+        "id": db_status['id'],
+        "created_at": db_status['created_at'],
+        "content": db_status['content'],
+        "visibility": db_status['visibility'],
+        "sensitive": db_status['sensitive'],
+        "spoiler_text": db_status['spoiler_text'] or "",
+        "account": account,
+        "media_attachments": [
+            {
+                "id": media['id'],
+                # The JSON-aggregated timeline labels the column "type";
+                # bulk media rows come back with the raw "file_type" name
+                "type": media.get('type') or media['file_type'],
+                "url": media['url'],
+                "preview_url": media['url'],
+                "remote_url": None,
+                "text_url": None,
+                "description": media['description'] or None,
+                "blurhash": None
+            }
+            for media in media_attachments
+        ],
+        "mentions": [],
+        "tags": [],
+        "emojis": [],
+        "reblogs_count": 0,
+        "favourites_count": 0,
+        "reblogged": False,
+        "favourited": False,
+        "muted": False,
+        "bookmarked": False,
+        "pinned": False
+    }
 
 @app.post("/api/v1/media")
 async def upload_media(
@@ -108,31 +311,50 @@ async def upload_media(
 ):
     """
     Upload media file.
-    
+
     Args:
         file: Media file to upload
         description: Optional media description
-        
+
     Returns:
         Dict containing media attachment info
     """
     try:
-        # Generate a unique ID for the media
-        media_id = str(uuid.uuid4())
-        
-        # Save file with the media_id as the filename
         file_extension = os.path.splitext(file.filename)[1]
-        file_path = MEDIA_DIR / f"{media_id}{file_extension}"
-        
+
         # Ensure media directory exists
         os.makedirs(MEDIA_DIR, exist_ok=True)
-        
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-            
+
+        # Stream to disk in fixed-size chunks: memory stays bounded by
+        # one chunk instead of the whole upload, and the blocking writes
+        # run in the threadpool so the event loop keeps serving requests.
+        # The content hash rides along on the same pass, so the file can
+        # be stored under a content-addressed name: re-uploads of the
+        # same bytes land on the same path instead of piling up copies.
+        tmp_path = MEDIA_DIR / f".upload-{uuid.uuid4().hex}"
+        hasher = hashlib.blake2b(digest_size=16)
+        try:
+            f = await run_in_threadpool(open, tmp_path, "wb")
+            try:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    await run_in_threadpool(f.write, chunk)
+            finally:
+                await run_in_threadpool(f.close)
+
+            # Rename into place before anything references the final
+            # name: one cheap syscall, and the returned /media URL is
+            # guaranteed to resolve the moment the client sees it
+            file_path = MEDIA_DIR / f"{hasher.hexdigest()}{file_extension}"
+            await run_in_threadpool(os.replace, tmp_path, file_path)
+        except BaseException:
+            # Don't leave orphaned .upload-* files behind on failure
+            await run_in_threadpool(tmp_path.unlink, missing_ok=True)
+            raise
+
         # Create media attachment in the database without a status_id
-        attachment = db.create_media_attachment(
+        attachment = await run_in_threadpool(
+            db.create_media_attachment,
             file_path=f"/media/{file_path.name}",
             file_type=file.content_type or "image/jpeg",
             description=description
@@ -141,8 +363,8 @@ async def upload_media(
         if not attachment:
             raise HTTPException(status_code=500, detail="Failed to create media attachment")
         
-        # Return response in Mastodon format
-        return {
+        # Return response in Mastodon format; straight through orjson
+        return ORJSONResponse({
             "id": attachment['id'],
             "type": "image",
             "url": f"/media/{file_path.name}",
@@ -151,27 +373,30 @@ async def upload_media(
             "text_url": None,
             "description": description,
             "blurhash": None
-        }
-        
+        })
+
     except Exception as e:
         logger.error(f"Error uploading media: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/token", response_model=Token)
+@app.post("/token")
 async def login(login_data: LoginRequest):
     """Login endpoint to get access token."""
-    user = db.verify_user(login_data.username, login_data.password)
+    # scrypt verification is deliberately slow; keep it off the event loop
+    user = await run_in_threadpool(db.verify_user, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=401,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     access_token = create_access_token(
         data={"sub": user['username']}
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    # The token shape is fixed, so skip the response-model revalidation
+    # and encode straight with orjson
+    return ORJSONResponse({"access_token": access_token, "token_type": "bearer"})
 
 @app.post("/api/v1/statuses")
 async def create_status(
@@ -204,7 +429,8 @@ async def create_status(
                 logger.warning(f"Could not find coordinates for place: {status.place_name}")
         
         # Create status in database directly
-        db_status = db.create_status(
+        db_status = await run_in_threadpool(
+            db.create_status,
             user_id=current_user['id'],
             content=status.status,
             visibility=status.visibility,
@@ -217,26 +443,23 @@ async def create_status(
         if not db_status:
             raise HTTPException(status_code=500, detail="Failed to create status")
             
-        # Extract and add hashtags
-        hashtags = re.findall(r'#(\w+)', status.status)
-        for hashtag_name in hashtags:
-            hashtag = db.create_hashtag(hashtag_name)
-            if hashtag:
-                db.link_status_to_hashtag(db_status['id'], hashtag['id'])
+        # Extract and add hashtags: one batched upsert and one batched
+        # link insert instead of two round trips per tag
+        await run_in_threadpool(db.attach_hashtags, db_status['id'], _HASHTAG_RE.findall(status.status))
                 
         # Add media attachments if present
         media_ids = status.media_ids or status.media_ids_  # Try both formats
         if media_ids:
-            for media_id in media_ids:
-                # Update the media attachment with the new status ID
-                updated_media = db.update_media_status(media_id, db_status['id'])
-                if not updated_media:
-                    logger.warning(f"Could not update media attachment {media_id} with status {db_status['id']}")
+            # Attach every id in one UPDATE rather than a query per media
+            updated = await run_in_threadpool(db.update_media_statuses, media_ids, db_status['id'])
+            missing = set(media_ids) - {str(m['id']) for m in updated}
+            if missing:
+                logger.warning(f"Could not update media attachments {sorted(missing)} with status {db_status['id']}")
                     
         # Create response in Mastodon format
         status_data = {
             "id": db_status['id'],
-            "created_at": db_status['created_at'].isoformat(),
+            "created_at": db_status['created_at'],
             "content": db_status['content'],
             "visibility": db_status['visibility'],
             "sensitive": db_status['sensitive'],
@@ -267,7 +490,7 @@ async def create_status(
             }
             
         # Add media attachments
-        media_attachments = db.get_status_media(db_status['id'])
+        media_attachments = await run_in_threadpool(db.get_status_media, db_status['id'])
         if media_attachments:
             status_data["media_attachments"] = [
                 {
@@ -283,102 +506,78 @@ async def create_status(
                 for media in media_attachments
             ]
         
-        return status_data
-        
+        # Hand the dict straight to orjson: skips FastAPI's per-field
+        # jsonable_encoder traversal, and orjson renders the datetime
+        # and UUID values natively
+        return ORJSONResponse(status_data)
+
     except Exception as e:
         logger.error(f"Error creating status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/timelines/public")
 async def get_public_timeline(
+    request: Request,
     limit: int = 20,
     since_id: Optional[str] = None,
     max_id: Optional[str] = None
 ):
     """
     Get public timeline.
-    
+
     Args:
+        request: Incoming request (for conditional-GET headers)
         limit: Number of statuses to fetch
         since_id: Return only statuses newer than this ID
         max_id: Return only statuses older than this ID
-        
+
     Returns:
         List of statuses
     """
     try:
-        # Get statuses from database
-        db_statuses = db.get_public_timeline(limit, since_id, max_id)
-        
-        # Convert to Mastodon format
-        statuses = []
-        for db_status in db_statuses:
-            # Get user
-            user = db.get_user_by_id(db_status['user_id'])
-            if not user:
-                continue
-                
-            # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
-            # Create status dict
-            status = {
-                "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
-                "content": db_status['content'],
-                "visibility": db_status['visibility'],
-                "sensitive": db_status['sensitive'],
-                "spoiler_text": db_status['spoiler_text'] or "",
-                "account": format_account(user),
-                "media_attachments": [
-                    {
-                        "id": media['id'],
-                        "type": media['file_type'],
-                        "url": media['url'],
-                        "preview_url": media['url'],
-                        "remote_url": None,
-                        "text_url": None,
-                        "description": media['description'] or None,
-                        "blurhash": None
-                    }
-                    for media in media_attachments
-                ],
-                "mentions": [],
-                "tags": [],
-                "emojis": [],
-                "reblogs_count": 0,
-                "favourites_count": 0,
-                "reblogged": False,
-                "favourited": False,
-                "muted": False,
-                "bookmarked": False,
-                "pinned": False
-            }
+        cache_key = ("public", limit, since_id, max_id)
+        async def build():
+            # Author and media ride along as JSON columns, so the whole
+            # page is one round trip
+            db_statuses = await run_in_threadpool(
+                db.get_public_timeline_with_details, limit, since_id, max_id)
+
+            # Convert to Mastodon format
+            statuses = []
+            for db_status in db_statuses:
+                user = db_status['account']
+
+                # Create status dict
+                status = _status_payload(db_status, format_account(user), db_status['media'])
             
-            # Add location if present
-            if db_status['latitude'] is not None and db_status['longitude'] is not None:
-                # Get place name from coordinates
-                location_info = await location_service.get_location_info(
-                    db_status['latitude'],
-                    db_status['longitude']
-                )
+                # Add location if present
+                if db_status['latitude'] is not None and db_status['longitude'] is not None:
+                    # Get place name from coordinates
+                    location_info = await location_service.get_location_info(
+                        db_status['latitude'],
+                        db_status['longitude']
+                    )
                 
-                status["location"] = {
-                    "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
-                    "type": "Point",
-                    "coordinates": [db_status['longitude'], db_status['latitude']]
-                }
-            
-            statuses.append(status)
+                    status["location"] = {
+                        "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
+                        "type": "Point",
+                        "coordinates": [db_status['longitude'], db_status['latitude']]
+                    }
             
-        return statuses
-        
+                statuses.append(status)
+
+            return statuses
+
+        etag, body = await _timeline_build(cache_key, build)
+        return _timeline_response(request, etag, body)
+
     except Exception as e:
         logger.error(f"Error getting public timeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/timelines/tag/{hashtag}")
 async def get_hashtag_timeline(
+    request: Request,
     hashtag: str,
     limit: int = 20,
     since_id: Optional[str] = None,
@@ -386,89 +585,71 @@ async def get_hashtag_timeline(
 ):
     """
     Get timeline for a hashtag.
-    
+
     Args:
+        request: Incoming request (for conditional-GET headers)
         hashtag: Hashtag to search for
         limit: Number of statuses to fetch
         since_id: Return only statuses newer than this ID
         max_id: Return only statuses older than this ID
-        
+
     Returns:
         List of statuses
     """
     try:
-        # Get statuses from database
-        db_statuses = db.get_hashtag_timeline(hashtag, limit, since_id, max_id)
+        # Tags are stored lowercased; normalize before the cache key so
+        # #Python and #python share one cached page
+        hashtag = hashtag.lower()
+        cache_key = ("tag", hashtag, limit, since_id, max_id)
+        async def build():
+            # Get statuses from database
+            db_statuses = await run_in_threadpool(
+                db.get_hashtag_timeline, hashtag, limit, since_id, max_id)
         
-        # Convert to Mastodon format
-        statuses = []
-        for db_status in db_statuses:
-            # Get user
-            user = db.get_user_by_id(db_status['user_id'])
-            if not user:
-                continue
-                
-            # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
-            # Create status dict
-            status = {
-                "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
-                "content": db_status['content'],
-                "visibility": db_status['visibility'],
-                "sensitive": db_status['sensitive'],
-                "spoiler_text": db_status['spoiler_text'] or "",
-                "account": format_account(user),
-                "media_attachments": [
-                    {
-                        "id": media['id'],
-                        "type": media['file_type'],
-                        "url": media['url'],
-                        "preview_url": media['url'],
-                        "remote_url": None,
-                        "text_url": None,
-                        "description": media['description'] or None,
-                        "blurhash": None
-                    }
-                    for media in media_attachments
-                ],
-                "mentions": [],
-                "tags": [],
-                "emojis": [],
-                "reblogs_count": 0,
-                "favourites_count": 0,
-                "reblogged": False,
-                "favourited": False,
-                "muted": False,
-                "bookmarked": False,
-                "pinned": False
-            }
+            # One query for all authors and one for all attachments,
+            # instead of two round trips per status
+            users = await run_in_threadpool(db.get_users_by_ids, {s['user_id'] for s in db_statuses})
+            media_map = await run_in_threadpool(db.get_status_media_bulk, [s['id'] for s in db_statuses])
+
+            # Convert to Mastodon format
+            statuses = []
+            for db_status in db_statuses:
+                user = users.get(db_status['user_id'])
+                if not user:
+                    continue
+
+                # Create status dict
+                status = _status_payload(db_status, format_account(user),
+                                         media_map.get(db_status['id'], []))
             
-            # Add location if present
-            if db_status['latitude'] is not None and db_status['longitude'] is not None:
-                # Get place name from coordinates
-                location_info = await location_service.get_location_info(
-                    db_status['latitude'],
-                    db_status['longitude']
-                )
+                # Add location if present
+                if db_status['latitude'] is not None and db_status['longitude'] is not None:
+                    # Get place name from coordinates
+                    location_info = await location_service.get_location_info(
+                        db_status['latitude'],
+                        db_status['longitude']
+                    )
                 
-                status["location"] = {
-                    "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
-                    "type": "Point",
-                    "coordinates": [db_status['longitude'], db_status['latitude']]
-                }
-            
-            statuses.append(status)
+                    status["location"] = {
+                        "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
+                        "type": "Point",
+                        "coordinates": [db_status['longitude'], db_status['latitude']]
+                    }
             
-        return statuses
-        
+                statuses.append(status)
+
+            return statuses
+
+        etag, body = await _timeline_build(cache_key, build)
+        return _timeline_response(request, etag, body)
+
     except Exception as e:
         logger.error(f"Error getting hashtag timeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/v1/accounts/{username}/statuses")
 async def get_user_timeline(
+    request: Request,
     username: str,
     limit: int = 20,
     since_id: Optional[str] = None,
@@ -476,83 +657,60 @@ async def get_user_timeline(
 ):
     """
     Get timeline for a user.
-    
+
     Args:
+        request: Incoming request (for conditional-GET headers)
         username: Username to fetch statuses for
         limit: Number of statuses to fetch
         since_id: Return only statuses newer than this ID
         max_id: Return only statuses older than this ID
-        
+
     Returns:
         List of statuses
     """
     try:
-        # Get user
-        user = db.get_user(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+        cache_key = ("user", username, limit, since_id, max_id)
+        async def build():
+            # Get user
+            user = await run_in_threadpool(_cached_get_user, username)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
             
-        # Get statuses from database
-        db_statuses = db.get_user_statuses(user['id'], limit, since_id, max_id)
+            # Get statuses from database
+            db_statuses = await run_in_threadpool(
+                db.get_user_statuses, user['id'], limit, since_id, max_id)
         
-        # Convert to Mastodon format
-        statuses = []
-        for db_status in db_statuses:
-            # Get media attachments
-            media_attachments = db.get_status_media(db_status['id'])
-            
-            # Create status dict
-            status = {
-                "id": db_status['id'],
-                "created_at": db_status['created_at'].isoformat(),
-                "content": db_status['content'],
-                "visibility": db_status['visibility'],
-                "sensitive": db_status['sensitive'],
-                "spoiler_text": db_status['spoiler_text'] or "",
-                "account": format_account(user),
-                "media_attachments": [
-                    {
-                        "id": media['id'],
-                        "type": media['file_type'],
-                        "url": media['url'],
-                        "preview_url": media['url'],
-                        "remote_url": None,
-                        "text_url": None,
-                        "description": media['description'] or None,
-                        "blurhash": None
-                    }
-                    for media in media_attachments
-                ],
-                "mentions": [],
-                "tags": [],
-                "emojis": [],
-                "reblogs_count": 0,
-                "favourites_count": 0,
-                "reblogged": False,
-                "favourited": False,
-                "muted": False,
-                "bookmarked": False,
-                "pinned": False
-            }
+            # One query for all attachments instead of one per status
+            media_map = await run_in_threadpool(db.get_status_media_bulk, [s['id'] for s in db_statuses])
+
+            # Convert to Mastodon format
+            statuses = []
+            for db_status in db_statuses:
+                # Create status dict
+                status = _status_payload(db_status, format_account(user),
+                                         media_map.get(db_status['id'], []))
             
-            # Add location if present
-            if db_status['latitude'] is not None and db_status['longitude'] is not None:
-                # Get place name from coordinates
-                location_info = await location_service.get_location_info(
-                    db_status['latitude'],
-                    db_status['longitude']
-                )
+                # Add location if present
+                if db_status['latitude'] is not None and db_status['longitude'] is not None:
+                    # Get place name from coordinates
+                    location_info = await location_service.get_location_info(
+                        db_status['latitude'],
+                        db_status['longitude']
+                    )
                 
-                status["location"] = {
-                    "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
-                    "type": "Point",
-                    "coordinates": [db_status['longitude'], db_status['latitude']]
-                }
-            
-            statuses.append(status)
+                    status["location"] = {
+                        "name": location_info['address'] if location_info else f"{db_status['latitude']}, {db_status['longitude']}",
+                        "type": "Point",
+                        "coordinates": [db_status['longitude'], db_status['latitude']]
+                    }
             
-        return statuses
-        
+                statuses.append(status)
+
+            return statuses
+
+        etag, body = await _timeline_build(cache_key, build)
+        return _timeline_response(request, etag, body)
+
     except Exception as e:
         logger.error(f"Error getting user timeline: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -570,13 +728,13 @@ async def get_account(username: str):
     """
     try:
         # Get user
-        user = db.get_user(username)
+        user = await run_in_threadpool(_cached_get_user, username)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
             
-        # Format account
-        return format_account(user)
-        
+        # Format account; bypass the jsonable_encoder pass on the way out
+        return ORJSONResponse(format_account(user))
+
     except Exception as e:
         logger.error(f"Error getting account: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -592,42 +750,40 @@ async def webfinger(resource: str):
     Returns:
         WebFinger response
     """
-    try:
-        # Parse resource
-        if not resource.startswith("acct:"):
-            raise HTTPException(status_code=400, detail="Invalid resource format")
-            
-        username, domain = resource[5:].split("@")
-        
-        # Get user
-        user = db.get_user(username)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-            
-        # Create response
-        return {
-            "subject": resource,
-            "aliases": [
-                f"https://example.com/users/{username}",
-                f"https://example.com/@{username}"
-            ],
-            "links": [
-                {
-                    "rel": "http://webfinger.net/rel/profile-page",
-                    "type": "text/html",
-                    "href": f"https://example.com/users/{username}"
-                },
-                {
-                    "rel": "self",
-                    "type": "application/activity+json",
-                    "href": f"https://example.com/users/{username}"
-                }
-            ]
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in WebFinger: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Parse resource in one anchored pass; a stray second "@" used to
+    # slip past the startswith check, blow up the tuple unpack and come
+    # back as a 500 through the blanket except
+    match = _WEBFINGER_RE.match(resource)
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid resource format")
+
+    username = match.group(1)
+
+    # Get user
+    user = await run_in_threadpool(_cached_get_user, username)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Create response
+    return {
+        "subject": resource,
+        "aliases": [
+            f"https://example.com/users/{username}",
+            f"https://example.com/@{username}"
+        ],
+        "links": [
+            {
+                "rel": "http://webfinger.net/rel/profile-page",
+                "type": "text/html",
+                "href": f"https://example.com/users/{username}"
+            },
+            {
+                "rel": "self",
+                "type": "application/activity+json",
+                "href": f"https://example.com/users/{username}"
+            }
+        ]
+    }
 
 @app.post("/api/v1/accounts")
 async def create_account(account: AccountCreate):
@@ -642,26 +798,46 @@ async def create_account(account: AccountCreate):
     """
     try:
         # Check if username exists
-        existing_user = db.get_user(account.username)
+        existing_user = await run_in_threadpool(db.get_user, account.username)
         if existing_user:
             raise HTTPException(status_code=400, detail="Username already exists")
             
         # Create user
-        user = db.create_user(
+        user = await run_in_threadpool(
+            db.create_user,
             username=account.username,
-            password_hash=account.password,  # In production, hash the password
+            password=account.password,
             email=account.email
         )
         
         if not user:
             raise HTTPException(status_code=500, detail="Failed to create user")
-            
-        # Format account
-        return format_account(user)
-        
+
+        # Drop any cached row for this name so lookups see the new user
+        _user_by_name_cache.pop(account.username, None)
+
+        # Format account; bypass the jsonable_encoder pass on the way out
+        return ORJSONResponse(format_account(user))
+
     except Exception as e:
         logger.error(f"Error creating account: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    # The import string (rather than the app object) lets uvicorn fork
+    # worker processes, so timeline lookups don't contend on a single
+    # process's GIL. The mostly-I/O-bound workload benefits from more
+    # workers than cores (gunicorn's classic 2n+1 rule); WEB_CONCURRENCY
+    # overrides it, and is also what `gunicorn -k UvicornWorker` reads
+    # when deploying behind a process manager instead. loop/http "auto"
+    # picks uvloop and httptools — the C event loop and parser — which
+    # uvicorn[standard] now pulls in.
+    workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+    uvicorn.run(
+        "server.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="auto",
+        http="auto",
+        workers=workers,
+    ) 
\ No newline at end of file
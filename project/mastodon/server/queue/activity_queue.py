@@ -6,7 +6,9 @@ This module implements the RabbitMQ-based queue system for ActivityPub activitie
 
 import json
 import logging
-from typing import Dict, Optional, Callable
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Callable
 import pika
 from datetime import datetime
 
@@ -14,6 +16,19 @@ from datetime import datetime
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Opportunistic batching: flush the buffer once it holds this many
+# activities, or FLUSH_INTERVAL seconds after the first one is buffered
+# (a timer armed at that point guarantees the time bound even if no
+# further activity ever arrives)
+FLUSH_MAX = 64
+FLUSH_INTERVAL = 0.05  # seconds
+
+# Shared properties object — identical for every published message
+_PERSISTENT_JSON = pika.BasicProperties(
+    delivery_mode=2,  # make message persistent
+    content_type='application/json'
+)
+
 class ActivityQueue:
     """Handles queuing and processing of outgoing ActivityPub activities."""
     
@@ -34,7 +49,95 @@ class ActivityQueue:
         
         # Set QoS to ensure fair distribution
         self.channel.basic_qos(prefetch_count=1)
-        
+
+        # Buffer for opportunistically batched publishes. The lock
+        # serializes buffer and channel access between callers and the
+        # flush timer's thread (pika channels are not thread-safe).
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_timer = None
+
+    def enqueue_batch(self, activities: List[Dict]) -> int:
+        """
+        Publish a batch of activities to the outbox queue in one pass.
+
+        Metadata is stamped with a single timestamp and every message
+        shares one properties object, so per-message overhead is limited
+        to the basic_publish call itself.
+
+        Args:
+            activities: Activities to queue
+
+        Returns:
+            int: Number of activities published
+        """
+        published = 0
+        now_iso = datetime.utcnow().isoformat()
+        try:
+            for activity in activities:
+                activity['queued_at'] = now_iso
+                activity['retry_count'] = 0
+                self.channel.basic_publish(
+                    exchange='',
+                    routing_key='activitypub_outbox',
+                    body=json.dumps(activity),
+                    properties=_PERSISTENT_JSON
+                )
+                published += 1
+            if published:
+                logger.info(f"Queued batch of {published} activities for delivery")
+        except Exception as e:
+            logger.error(f"Failed to queue activity batch: {e}")
+        return published
+
+    def enqueue_activity_buffered(self, activity: Dict) -> bool:
+        """
+        Buffer an activity and flush opportunistically.
+
+        Activities accumulate in an in-process buffer and are published
+        together once FLUSH_MAX pile up; buffering the first one arms a
+        timer so everything is on the broker within FLUSH_INTERVAL
+        seconds even if no further activity arrives.
+
+        Args:
+            activity: Activity to queue
+
+        Returns:
+            bool: True if accepted (publishing may be deferred)
+        """
+        with self._lock:
+            self._buffer.append(activity)
+            if len(self._buffer) >= FLUSH_MAX:
+                self.enqueue_batch(self._drain())
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
+
+    def _drain(self) -> List[Dict]:
+        """Take the buffered batch and disarm the timer. Lock must be held."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        batch = list(self._buffer)
+        self._buffer.clear()
+        return batch
+
+    def flush(self) -> int:
+        """
+        Publish any buffered activities immediately.
+
+        Returns:
+            int: Number of activities published
+        """
+        with self._lock:
+            batch = self._drain()
+            if not batch:
+                return 0
+            return self.enqueue_batch(batch)
+
+
     def enqueue_activity(self, activity: Dict) -> bool:
         """
         Add an activity to the outbox queue.
@@ -135,7 +238,10 @@ class ActivityQueue:
         """
         try:
             retried = 0
-            
+
+            # One timestamp for the whole retry pass instead of one per message
+            now_iso = datetime.utcnow().isoformat()
+
             # Get all messages from failed queue
             while True:
                 method_frame, header_frame, body = self.channel.basic_get(
@@ -151,7 +257,7 @@ class ActivityQueue:
                 
                 if retry_count < 3:  # Max 3 retries
                     activity['retry_count'] = retry_count + 1
-                    activity['last_retry'] = datetime.utcnow().isoformat()
+                    activity['last_retry'] = now_iso
                     
                     # Move back to outbox queue
                     self.channel.basic_publish(
@@ -175,5 +281,6 @@ class ActivityQueue:
             return 0
             
     def close(self):
-        """Close the RabbitMQ connection."""
-        self.connection.close() 
\ No newline at end of file
+        """Flush any buffered activities and close the RabbitMQ connection."""
+        self.flush()
+        self.connection.close()
\ No newline at end of file
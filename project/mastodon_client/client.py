@@ -55,19 +55,45 @@ class MastodonClient:
         self.domain = domain
         self.user_agent = user_agent
         self.session = None
-        
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared aiohttp session, creating it on first use.
+
+        A single session with a keep-alive connection pool lets concurrent
+        timeline calls reuse warm TCP+TLS connections instead of paying a
+        fresh handshake per request.
+
+        Returns:
+            Shared aiohttp session
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=20,
+                    keepalive_timeout=60
+                ),
+                timeout=aiohttp.ClientTimeout(total=30, connect=5),
+                headers={'User-Agent': self.user_agent}
+            )
+        return self.session
+
+    async def close(self):
+        """Close the shared aiohttp session."""
+        if self.session and not self.session.closed:
+            await self.session.close()
+
     async def __aenter__(self):
         """Create aiohttp session when entering context."""
-        self.session = aiohttp.ClientSession(
-            headers={'User-Agent': self.user_agent}
-        )
+        self._get_session()
         return self
-        
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Close aiohttp session when exiting context."""
-        if self.session:
-            await self.session.close()
-            
+        await self.close()
+
+
     def _get_signature_headers(
         self,
         method: str,
@@ -115,9 +141,8 @@ class MastodonClient:
         Returns:
             API response as dict
         """
-        if not self.session:
-            raise RuntimeError("Client must be used as async context manager")
-            
+        session = self._get_session()
+
         url = urljoin(self.instance_url, endpoint)
         
         # Prepare request data
@@ -129,7 +154,7 @@ class MastodonClient:
         headers = self._get_signature_headers(method, endpoint, body)
         
         # Make request
-        async with self.session.request(
+        async with session.request(
             method,
             url,
             params=params,